@@ -0,0 +1,91 @@
+# ==================== async_database.py ====================
+# Async access to JobDatabase for the FastAPI endpoints
+# Queries run on a dedicated bounded thread pool, so the event loop is never blocked
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import JobDatabase, _query_state
+from tracing import span, bind
+
+
+class AsyncJobDatabase:
+
+    def __init__(self, db=None, max_workers=None):
+        self.db = db or JobDatabase()
+
+        # SQLite connections are cheap, so one pool thread per concurrent query
+        if max_workers is None:
+            max_workers = int(os.getenv('DB_MAX_WORKERS', min(32, (os.cpu_count() or 1) + 4)))
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+
+    async def _run(self, method, *args, **kwargs):
+        cancel_event = threading.Event()
+
+        def call():
+            _query_state.cancel_event = cancel_event
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _query_state.cancel_event = None
+
+        loop = asyncio.get_running_loop()
+        with span(f'db.{method.__name__}'):
+            future = loop.run_in_executor(self.executor, bind(call))
+            try:
+                return await future
+            except asyncio.CancelledError:
+                # Interrupts the statement via the connection's progress handler
+                cancel_event.set()
+                raise
+
+    async def save_jobs(self, jobs):
+        return await self._run(self.db.save_jobs, jobs)
+
+    async def get_all_jobs(self, limit=100, offset=0, collapse=False):
+        return await self._run(self.db.get_all_jobs, limit=limit, offset=offset, collapse=collapse)
+
+    async def search_jobs(self, query="", location="", source="", min_salary=None):
+        return await self._run(self.db.search_jobs, query=query, location=location,
+                               source=source, min_salary=min_salary)
+
+    async def get_statistics(self):
+        return await self._run(self.db.get_statistics)
+
+    async def save_search_history(self, query, location, sources, results_count):
+        return await self._run(self.db.save_search_history, query, location, sources, results_count)
+
+    async def get_search_history(self, limit=20):
+        return await self._run(self.db.get_search_history, limit=limit)
+
+    async def get_top_queries(self, limit=10, days=None):
+        return await self._run(self.db.get_top_queries, limit=limit, days=days)
+
+    async def get_data_version(self, name):
+        return await self._run(self.db.get_data_version, name)
+
+    async def create_saved_search(self, query, location="", sources=None, salary=None, experience="all",
+                                  name=None):
+        return await self._run(self.db.create_saved_search, query, location=location, sources=sources,
+                               salary=salary, experience=experience, name=name)
+
+    async def get_saved_search(self, search_id):
+        return await self._run(self.db.get_saved_search, search_id)
+
+    async def list_saved_searches(self):
+        return await self._run(self.db.list_saved_searches)
+
+    async def delete_saved_search(self, search_id):
+        return await self._run(self.db.delete_saved_search, search_id)
+
+    async def get_new_jobs(self, search, after=None, limit=100, source_names=None):
+        return await self._run(self.db.get_new_jobs, search, after=after, limit=limit, source_names=source_names)
+
+    async def clear_old_jobs(self, days=30):
+        return await self._run(self.db.clear_old_jobs, days=days)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
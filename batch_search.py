@@ -0,0 +1,177 @@
+# ==================== batch_search.py ====================
+# Runs many query/location searches as one crawl: identical page fetches are
+# made once, and pages are interleaved fairly under one politeness schedule per host
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlparse
+
+from tracing import bind, span
+
+
+logger = logging.getLogger(__name__)
+
+
+class _PageTask:
+
+    def __init__(self, source, query, location, page, url):
+        self.source = source
+        self.query = query
+        self.location = location
+        self.page = page
+        self.url = url
+        # Indexes of the searches waiting for this page
+        self.searches = []
+
+
+class _SearchState:
+
+    def __init__(self, index, search):
+        self.index = index
+        self.search = search
+        self.jobs = []
+        self.pending = 0
+        self.pages_ok = 0
+        self.pages_failed = 0
+        self.reported = False
+
+
+class BatchCrawler:
+    """Fetches the result pages of many searches with one worker per host and egress route"""
+
+    def __init__(self, parser, delay=(10, 15), max_pages=None):
+        self.parser = parser
+        # Politeness delay between two pages from the same host, shared by all searches
+        self.delay = delay
+        self.max_pages = max_pages or int(os.getenv('BATCH_MAX_PAGES', 5))
+
+    def plan(self, searches):
+        """searches: dicts with query, location, sources, page, pages -> (page tasks per host, search states)"""
+        states = [_SearchState(i, search) for i, search in enumerate(searches)]
+        tasks = OrderedDict()
+        rounds = []
+
+        for state in states:
+            search = state.search
+            pages = max(1, min(search.get('pages', 1), self.max_pages))
+            for source in search['sources']:
+                if source not in self.parser.SOURCE_NAMES:
+                    continue
+                first = search.get('page', 0)
+                page_numbers = range(first, first + pages) if source in self.parser.PAGED_SOURCES else [0]
+                # Boards ignore case and extra whitespace, so those variants share one fetch
+                key_query = ' '.join(search['query'].lower().split())
+                key_location = ' '.join(search['location'].lower().split())
+                for depth, page in enumerate(page_numbers):
+                    key = self.parser.page_url(source, key_query, key_location, page)
+                    task = tasks.get(key)
+                    if task is None:
+                        url = self.parser.page_url(source, search['query'], search['location'], page)
+                        task = tasks[key] = _PageTask(source, search['query'], search['location'], page, url)
+                        while len(rounds) <= depth:
+                            rounds.append([])
+                        rounds[depth].append(task)
+                    task.searches.append(state.index)
+                    state.pending += 1
+
+        # Round-robin: every search's first page comes before anyone's second page
+        by_host = OrderedDict()
+        for round_tasks in rounds:
+            for task in round_tasks:
+                by_host.setdefault(urlparse(task.url).netloc, deque()).append(task)
+        return by_host, states, len(tasks)
+
+    def run(self, searches, on_result, cancel_event=None):
+        """Crawl all searches; on_result(index, jobs, info) is called as each search completes.
+
+        Every search is reported exactly once, also when the crawl fails or is cancelled.
+        """
+        cancel_event = cancel_event or threading.Event()
+        by_host, states, unique_pages = self.plan(searches)
+        requested_pages = sum(len(task.searches) for queue in by_host.values() for task in queue)
+        lock = threading.Lock()
+        started = time.perf_counter()
+        counters = {'fetched': 0, 'failed': 0}
+
+        def report(state, error=None):
+            # Called with lock held
+            if state.reported:
+                return
+            state.reported = True
+            info = {'pages_ok': state.pages_ok, 'pages_failed': state.pages_failed}
+            if error:
+                info['error'] = error
+            on_result(state.index, state.jobs, info)
+
+        def finish_task(task, jobs):
+            with lock:
+                counters['fetched' if jobs is not None else 'failed'] += 1
+                for index in task.searches:
+                    state = states[index]
+                    if jobs is None:
+                        state.pages_failed += 1
+                    else:
+                        state.pages_ok += 1
+                        state.jobs.extend(jobs)
+                    state.pending -= 1
+                    if state.pending == 0:
+                        report(state)
+
+        def work(host, queue):
+            sessions = {}
+            while queue and not cancel_event.is_set():
+                try:
+                    task = queue.popleft()
+                except IndexError:
+                    # Another worker of this host took the last page
+                    break
+                session = sessions.get(task.source)
+                if session is None:
+                    session = sessions[task.source] = self.parser.new_session(task.source)
+                try:
+                    with span('batch.page', url=task.url, searches=len(task.searches)):
+                        jobs = self.parser.fetch_page(session, task.source, task.query, task.location, task.page)
+                except Exception as e:
+                    logger.error(f"❌ {task.url}: {e}")
+                    jobs = None
+                finish_task(task, jobs)
+
+                if queue and not cancel_event.is_set():
+                    # Interruptible politeness delay
+                    cancel_event.wait(random.uniform(*self.delay) * self.parser.sleep_scale)
+
+        # Each egress route has its own rate budget per host, so a host gets one worker per route
+        workers = self.parser.egress.size
+        threads = [threading.Thread(target=bind(work), args=(host, queue), name=f'batch-{host}-{n}', daemon=True)
+                   for host, queue in by_host.items() for n in range(min(workers, len(queue)))]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            with lock:
+                for state in states:
+                    if state.reported:
+                        continue
+                    if state.pending == 0:
+                        report(state, 'no known sources')
+                    else:
+                        report(state, 'cancelled' if cancel_event.is_set() else 'incomplete')
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"🧺 Batch: {len(states)} searches, {unique_pages} pages "
+                    f"({requested_pages - unique_pages} deduplicated) over {len(by_host)} hosts in {elapsed:.1f}s")
+        return {
+            'searches': len(states),
+            'pages_requested': requested_pages,
+            'pages_fetched': counters['fetched'],
+            'pages_failed': counters['failed'],
+            'pages_deduplicated': requested_pages - unique_pages,
+            'hosts': len(by_host),
+            'elapsed_seconds': round(elapsed, 2),
+        }
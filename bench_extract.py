@@ -0,0 +1,122 @@
+# ==================== bench_extract.py ====================
+# Benchmark of job extraction per source: embedded JSON fast path vs DOM selectors
+# Runs both over fixture result pages and reports time per page and field completeness
+#
+# Usage: python bench_extract.py                        # generated fixtures (stand-in board pages)
+#        python bench_extract.py --save-fixtures fixtures/
+#        python bench_extract.py --fixtures fixtures/   # <source>*.html, e.g. saved real pages
+
+import argparse
+import glob
+import logging
+import os
+import statistics
+import time
+
+from loadtest import LOCATIONS, QUERIES, _fake_jobs, render_page
+
+
+SOURCES = ['indeed', 'linkedin', 'stepstone', 'eures']
+FIELDS = ['company', 'location', 'salary', 'summary', 'link']
+
+
+def generated_fixtures(pages, padding_kb):
+    fixtures = {}
+    for source in SOURCES:
+        fixtures[source] = []
+        for n in range(pages):
+            query, location = QUERIES[n % len(QUERIES)], LOCATIONS[n % len(LOCATIONS)]
+            jobs = _fake_jobs(f'bench:{source}:{n}', query, location, 10 if source == 'eures' else 15)
+            fixtures[source].append(render_page(source, jobs, structured_data=True, padding_kb=padding_kb))
+    return fixtures
+
+
+def load_fixtures(directory):
+    fixtures = {}
+    for source in SOURCES:
+        paths = sorted(glob.glob(os.path.join(directory, f'{source}*.html')))
+        if paths:
+            fixtures[source] = [open(path, encoding='utf-8').read() for path in paths]
+    return fixtures
+
+
+def save_fixtures(fixtures, directory):
+    os.makedirs(directory, exist_ok=True)
+    for source, pages in fixtures.items():
+        for n, page in enumerate(pages):
+            with open(os.path.join(directory, f'{source}_{n:03d}.html'), 'w', encoding='utf-8') as f:
+                f.write(page)
+
+
+def completeness(parser, source, jobs):
+    # Share of jobs where a field has real data rather than the extractor's default
+    if not jobs:
+        return {field: None for field in FIELDS}
+    defaults = {'company': 'Not specified', 'salary': 'Not specified', 'link': parser.BASE_URLS[source]}
+    result = {}
+    for field in FIELDS:
+        if field == 'summary':
+            filled = sum(1 for job in jobs if job['summary'] != f"{job['title']} at {job['company']}")
+        else:
+            filled = sum(1 for job in jobs if job[field] and job[field] != defaults.get(field))
+        result[field] = filled / len(jobs)
+    return result
+
+
+def run_path(extract, pages, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        results = [extract(page) for page in pages]
+        times.append((time.perf_counter() - started) / len(pages))
+    jobs = [job for page_jobs in results for job in (page_jobs or [])]
+    return statistics.median(times) * 1000, jobs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark embedded-JSON extraction against DOM selectors')
+    arg_parser.add_argument('--pages', type=int, default=20, help='Generated pages per source')
+    arg_parser.add_argument('--padding-kb', type=float, default=150,
+                            help='Boilerplate per generated page (real result pages are a few hundred KB)')
+    arg_parser.add_argument('--repeats', type=int, default=5, help='Timed runs per path')
+    arg_parser.add_argument('--fixtures', help='Directory with <source>*.html pages to use instead')
+    arg_parser.add_argument('--save-fixtures', help='Write the generated pages to this directory')
+    args = arg_parser.parse_args()
+
+    # Imported here so the parser's logging setup does not run before argparse
+    from parser import InternationalJobParser
+    logging.getLogger('parser').setLevel(logging.WARNING)
+    parser = InternationalJobParser()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else generated_fixtures(args.pages, args.padding_kb)
+    if args.save_fixtures:
+        save_fixtures(fixtures, args.save_fixtures)
+        print(f'Fixtures written to {args.save_fixtures}')
+
+    print(f"{'source':10} {'pages':>5} {'KB/page':>8} {'path':>5} {'ms/page':>8} {'jobs':>5}  "
+          + ' '.join(f'{field:>8}' for field in FIELDS))
+    for source, pages in fixtures.items():
+        name = parser.SOURCE_NAMES[source]
+        size_kb = sum(len(page) for page in pages) / len(pages) / 1024
+
+        def dom(page):
+            soup = parser._parse_html(name, page)
+            return getattr(parser, f'_extract_{source}')(soup, '')
+
+        def structured(page):
+            return parser._extract_structured(source, page, '')
+
+        rows = {'dom': run_path(dom, pages, args.repeats), 'json': run_path(structured, pages, args.repeats)}
+        for path, (ms, jobs) in rows.items():
+            filled = completeness(parser, source, jobs)
+            cells = ' '.join(f'{value:>8.0%}' if value is not None else f'{"-":>8}' for value in filled.values())
+            print(f'{source:10} {len(pages):>5} {size_kb:>8.0f} {path:>5} {ms:>8.2f} {len(jobs):>5}  {cells}')
+        dom_ms, json_ms = rows['dom'][0], rows['json'][0]
+        if rows['json'][1]:
+            print(f'{"":10} json path {dom_ms / json_ms:.0f}x faster')
+        else:
+            print(f'{"":10} no embedded JSON, DOM selectors only')
+
+
+if __name__ == '__main__':
+    main()
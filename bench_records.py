@@ -0,0 +1,136 @@
+# ==================== bench_records.py ====================
+# Benchmark of the parse -> filter -> save pipeline with per-job dicts vs JobRecord
+# Builds the jobs of N synthetic result pages both ways and reports time and memory
+#
+# Usage: python bench_records.py --pages 2000
+#        python bench_records.py --pages 200 --db   # also saves both into a temporary jobs.db
+
+import argparse
+import gc
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from job_record import JobPage, JobRecord
+from loadtest import LOCATIONS, QUERIES, _fake_jobs
+
+
+SOURCES = ['Indeed', 'LinkedIn', 'StepStone', 'EURES']
+
+
+def make_cards(pages, per_page=15):
+    # What the extractors have in hand per card: already cleaned strings
+    result = []
+    for n in range(pages):
+        query, location = QUERIES[n % len(QUERIES)], LOCATIONS[n % len(LOCATIONS)]
+        cards = [(j['title'], j['company'], j['location'], j['salary'] or 'Not specified',
+                  j['summary'][:400], f'https://example.com/{n}/{j["id"]}')
+                 for j in _fake_jobs(f'bench:{n}', query, location, per_page)]
+        result.append((SOURCES[n % len(SOURCES)], cards))
+    return result
+
+
+def dict_pipeline(card_pages, filter_jobs):
+    # Before: one 10-key dict per card, filtered into a new list, copied again on enqueue
+    all_jobs = []
+    for source, cards in card_pages:
+        jobs = []
+        for title, company, location, salary, summary, link in cards:
+            jobs.append({
+                'title': title,
+                'company': company,
+                'location': location,
+                'salary': salary,
+                'summary': summary,
+                'link': link,
+                'source': source,
+                'posted_date': 'recent',
+                'is_recent': True,
+                'parsed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+        all_jobs.extend(jobs)
+    filtered = filter_jobs(all_jobs, experience_level='junior')
+    return list(filtered)
+
+
+def record_pipeline(card_pages, iter_filtered_jobs):
+    # After: slotted records sharing one JobPage per page, filtered lazily, queued without a copy
+    all_jobs = []
+    for source, cards in card_pages:
+        page = JobPage(source)
+        all_jobs.extend(JobRecord(page, *card) for card in cards)
+    return list(iter_filtered_jobs(all_jobs, experience_level='junior'))
+
+
+def measure(pipeline, card_pages, helper, repeats):
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        jobs = pipeline(card_pages, helper)
+        times.append(time.perf_counter() - started)
+        del jobs
+
+    gc.collect()
+    tracemalloc.start()
+    jobs = pipeline(card_pages, helper)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return jobs, {
+        'median_ms': round(statistics.median(times) * 1000, 1),
+        'best_ms': round(min(times) * 1000, 1),
+        'retained_kib': round(retained / 1024),
+        'peak_kib': round(peak / 1024),
+    }
+
+
+def save_both(dict_jobs, record_jobs):
+    from database import JobDatabase
+
+    results = {}
+    for name, jobs in (('dicts', dict_jobs), ('records', record_jobs)):
+        with tempfile.TemporaryDirectory() as workdir:
+            db = JobDatabase(os.path.join(workdir, 'jobs.db'))
+            started = time.perf_counter()
+            saved = db.save_jobs(jobs)
+            results[name] = (saved, round((time.perf_counter() - started) * 1000, 1))
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark per-job dicts against JobRecord')
+    arg_parser.add_argument('--pages', type=int, default=2000, help='Synthetic result pages (15 jobs each)')
+    arg_parser.add_argument('--repeats', type=int, default=5, help='Timed runs per variant')
+    arg_parser.add_argument('--db', action='store_true', help='Also save both job lists into a temporary jobs.db')
+    args = arg_parser.parse_args()
+
+    # Imported here so the parser's logging setup does not run before argparse
+    from parser import InternationalJobParser
+
+    card_pages = make_cards(args.pages)
+    print(f'{args.pages} pages, {args.pages * 15} jobs, filter experience=junior')
+
+    dict_jobs, before = measure(dict_pipeline, card_pages, InternationalJobParser.filter_jobs, args.repeats)
+    record_jobs, after = measure(record_pipeline, card_pages, InternationalJobParser.iter_filtered_jobs,
+                                 args.repeats)
+    # Same jobs either way (parsed_at may differ by the second it was taken in)
+    assert [{**dict(job), 'parsed_at': None} for job in record_jobs] == \
+        [{**job, 'parsed_at': None} for job in dict_jobs]
+
+    print(f"{'':10} {'median ms':>10} {'best ms':>10} {'retained KiB':>13} {'peak KiB':>10}")
+    for name, result in (('dicts', before), ('records', after)):
+        print(f"{name:10} {result['median_ms']:>10} {result['best_ms']:>10} "
+              f"{result['retained_kib']:>13} {result['peak_kib']:>10}")
+    print(f"records use {before['retained_kib'] / max(after['retained_kib'], 1):.1f}x less memory, "
+          f"run {before['median_ms'] / max(after['median_ms'], 0.1):.1f}x faster")
+
+    if args.db:
+        for name, (saved, ms) in save_both(dict_jobs, record_jobs).items():
+            print(f'save_jobs {name}: {saved} saved in {ms} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,131 +4,575 @@
 
 import sqlite3
 import json
+import base64
+import os
+import threading
+from dedup import NearDuplicateIndex
+from lookups import LOOKUP_TABLES, LookupCache, normalize_location
+from datetime import datetime, timedelta
+
+
+# Per-thread cancellation flag, set by AsyncJobDatabase when the caller
+# of a query goes away (see async_database.py)
+_query_state = threading.local()
 
 
 class JobDatabase:
     
-    def __init__(self, db_path="jobs.db"):
+    def __init__(self, db_path="jobs.db", timeout=30, partition_by_month=None, defer_init=False):
         self.db_path = db_path
-        self.init_database()
+        self.timeout = timeout
+        if partition_by_month is None:
+            partition_by_month = os.getenv('JOBS_PARTITION_BY_MONTH', '0') == '1'
+        self.partition_by_month = partition_by_month
+        self.dedup = NearDuplicateIndex()
+        self.lookups = LookupCache()
+        # defer_init: schema work happens on the first connection instead of here
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        if not defer_init:
+            self.init_database()
+    
+    def ensure_initialized(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.init_database()
+
+    def _connect(self, check_same_thread=True):
+        self.ensure_initialized()
+        return self._open(check_same_thread)
+
+    def _open(self, check_same_thread=True):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=check_same_thread)
+        
+        # Abort the running statement as soon as the query is cancelled
+        cancel_event = getattr(_query_state, 'cancel_event', None)
+        if cancel_event is not None:
+            conn.set_progress_handler(lambda: 1 if cancel_event.is_set() else 0, 1000)
+        
+        return conn
     
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._open()
         cursor = conn.cursor()
         
+        # Only takes effect on a new file; existing ones are converted by
+        # enable_incremental_vacuum()
+        cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        # WAL lets readers run while a writer holds the lock
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
+        # Schema setup and layout migrations are one transaction: an interrupted upgrade
+        # leaves the old layout intact, and concurrent workers migrate one at a time
+        cursor.execute('BEGIN IMMEDIATE')
+        
+        # company/location/source names, referenced by id from the job tables
+        for table in LOOKUP_TABLES:
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT UNIQUE)')
+        
+        try:
+            # Databases from before dictionary encoding store names inline
+            if self._object_type(cursor, 'jobs') == 'table':
+                self._encode_jobs_table(cursor, 'jobs', 'jobs_data')
+            for table in self._partition_tables(cursor):
+                if 'company' in self._columns(cursor, table):
+                    self._encode_jobs_table(cursor, table, table)
+        
+            # A database that was partitioned once stays partitioned
+            if self._partition_tables(cursor):
+                self.partition_by_month = True
+        
+            if self.partition_by_month:
+                if self._object_type(cursor, 'jobs_data') == 'table':
+                    self._migrate_to_partitions(cursor)
+                self._current_partition(cursor)
+            else:
+                self._create_jobs_table(cursor, 'jobs_data')
+        
+            if self._object_type(cursor, 'jobs') != 'view':
+                self._rebuild_jobs_view(cursor)
+        
+        except Exception:
+            conn.rollback()
+            conn.close()
+            raise
+        
+        # LSH band -> near-duplicate cluster (see dedup.py)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                company TEXT,
+            CREATE TABLE IF NOT EXISTS job_lsh (
+                band_key INTEGER PRIMARY KEY,
+                cluster_id INTEGER,
+                seen_at TIMESTAMP
+            )
+        ''')
+        
+        # One row per normalized (query, location) with running totals,
+        # plus per-day rollups for windowed "top queries"
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS query_stats (
+                query_norm TEXT,
+                location_norm TEXT,
+                query TEXT,
                 location TEXT,
-                salary TEXT,
-                summary TEXT,
-                link TEXT UNIQUE,
-                source TEXT,
-                parsed_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                sources TEXT,
+                hits INTEGER DEFAULT 0,
+                total_results INTEGER DEFAULT 0,
+                last_results INTEGER,
+                first_seen TIMESTAMP,
+                last_seen TIMESTAMP,
+                PRIMARY KEY (query_norm, location_norm)
             )
         ''')
         
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS search_history (
+            CREATE TABLE IF NOT EXISTS query_stats_daily (
+                day TEXT,
+                query_norm TEXT,
+                location_norm TEXT,
+                hits INTEGER DEFAULT 0,
+                total_results INTEGER DEFAULT 0,
+                PRIMARY KEY (day, query_norm, location_norm)
+            )
+        ''')
+        
+        # Searches users poll for new jobs; cursor_* is the server-side watermark,
+        # the (created_at, id) of the newest job already delivered
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS saved_searches (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                query TEXT,
+                name TEXT,
+                query TEXT NOT NULL,
                 location TEXT,
                 sources TEXT,
-                results_count INTEGER,
-                search_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                salary TEXT,
+                experience TEXT DEFAULT 'all',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                cursor_created_at TIMESTAMP,
+                cursor_id INTEGER,
+                last_polled_at TIMESTAMP
+            )
+        ''')
+        
+        # Bumped on every write, so API responses can be revalidated without a query
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER,
+                updated_at TIMESTAMP
             )
         ''')
         
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source ON jobs(source)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_location ON jobs(location)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_lsh_seen_at ON job_lsh(seen_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_query_stats_hits ON query_stats(hits DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_query_stats_last_seen ON query_stats(last_seen DESC)')
+        
+        # Databases from before query analytics kept one search_history row per search
+        if self._object_type(cursor, 'search_history') == 'table':
+            self._migrate_search_history(cursor)
         
         conn.commit()
         conn.close()
+        self._initialized = True
     
-    def save_jobs(self, jobs):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    @staticmethod
+    def _object_type(cursor, name):
+        row = cursor.execute('SELECT type FROM sqlite_master WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _columns(cursor, table):
+        return [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+    
+    @staticmethod
+    def _create_jobs_table(cursor, name):
+        # Shared by the plain jobs_data table and the monthly partitions
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT,
+                company_id INTEGER REFERENCES companies(id),
+                location_id INTEGER REFERENCES locations(id),
+                salary TEXT,
+                summary TEXT,
+                link TEXT UNIQUE,
+                source_id INTEGER REFERENCES sources(id),
+                parsed_at TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                cluster_id INTEGER
+            )
+        ''')
+        
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_source ON {name}(source_id)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_company ON {name}(company_id)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_location ON {name}(location_id)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_created_at ON {name}(created_at)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_cluster ON {name}(cluster_id)')
+    
+    def _encode_jobs_table(self, cursor, old_name, new_name):
+        # One-off migration of a table with inline company/location/source text
+        columns = self._columns(cursor, old_name)
+        cluster = 'j.cluster_id' if 'cluster_id' in columns else 'NULL'
+        
+        if self._object_type(cursor, 'jobs') == 'view':
+            cursor.execute('DROP VIEW jobs')
+        cursor.execute(f'INSERT OR IGNORE INTO companies (name) SELECT DISTINCT company FROM {old_name} WHERE company IS NOT NULL')
+        cursor.execute(f'INSERT OR IGNORE INTO sources (name) SELECT DISTINCT source FROM {old_name} WHERE source IS NOT NULL')
+        
+        # Locations are normalized on the way in, so several raw spellings can map to one id
+        cursor.execute('CREATE TEMP TABLE location_map (raw TEXT PRIMARY KEY, location_id INTEGER)')
+        raw_locations = [row[0] for row in cursor.execute(
+            f'SELECT DISTINCT location FROM {old_name} WHERE location IS NOT NULL').fetchall()]
+        for raw in raw_locations:
+            location_id = self.lookups.get_id(cursor, 'locations', normalize_location(raw))
+            cursor.execute('INSERT INTO location_map VALUES (?, ?)', (raw, location_id))
+        
+        target = new_name if new_name != old_name else f'{new_name}_encoded'
+        self._create_jobs_table(cursor, target)
+        cursor.execute(f'''
+            INSERT INTO {target}
+            (id, title, company_id, location_id, salary, summary, link, source_id, parsed_at, created_at, cluster_id)
+            SELECT j.id, j.title, c.id, m.location_id, j.salary, j.summary, j.link, s.id,
+                   j.parsed_at, j.created_at, {cluster}
+            FROM {old_name} j
+            LEFT JOIN companies c ON c.name = j.company
+            LEFT JOIN location_map m ON m.raw = j.location
+            LEFT JOIN sources s ON s.name = j.source
+        ''')
+        cursor.execute('DROP TABLE location_map')
+        
+        seq = cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (old_name,)).fetchone()
+        cursor.execute(f'DROP TABLE {old_name}')
+        
+        if target != new_name:
+            # Recreate the indexes under the partition's own name
+            for index in [row[0] for row in cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (target,)).fetchall()]:
+                cursor.execute(f'DROP INDEX {index}')
+            cursor.execute(f'ALTER TABLE {target} RENAME TO {new_name}')
+            self._create_jobs_table(cursor, new_name)
+        
+        if seq:
+            cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (seq[0], new_name))
+    
+    def _decoded_select(self, table):
+        # Job rows with names instead of lookup ids, in the original column layout
+        return f'''
+            SELECT j.id, j.title, c.name AS company, l.name AS location, j.salary, j.summary,
+                   j.link, s.name AS source, j.parsed_at, j.created_at, j.cluster_id
+            FROM {table} j
+            LEFT JOIN companies c ON c.id = j.company_id
+            LEFT JOIN locations l ON l.id = j.location_id
+            LEFT JOIN sources s ON s.id = j.source_id
+        '''
+    
+    def _job_tables(self, cursor, newest_first=False):
+        # Physical tables holding job rows
+        if self.partition_by_month:
+            return self._partition_tables(cursor, newest_first=newest_first)
+        return ['jobs_data']
+    
+    def _rebuild_jobs_view(self, cursor):
+        # `jobs` is a read-only view with the original column layout
+        if self._object_type(cursor, 'jobs') == 'table':
+            # Table -> view transition: the rows move out before the view takes the name
+            self._encode_jobs_table(cursor, 'jobs', 'jobs_data')
+            if self.partition_by_month:
+                self._migrate_to_partitions(cursor)
+        tables = self._job_tables(cursor)
+        cursor.execute('DROP VIEW IF EXISTS jobs')
+        cursor.execute('CREATE VIEW jobs AS ' + ' UNION ALL '.join(self._decoded_select(t) for t in tables))
+    
+    # ---------- Monthly partitions ----------
+    # Each month lives in its own jobs_YYYYMM table and the `jobs` view
+    # spans all of them, so retention drops whole tables and
+    # recent-first queries stop after the newest partitions
+    
+    @staticmethod
+    def _partition_tables(cursor, newest_first=False):
+        cursor.execute(f'''
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name GLOB 'jobs_[0-9][0-9][0-9][0-9][0-9][0-9]'
+            ORDER BY name {'DESC' if newest_first else 'ASC'}
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _partition_bounds(name):
+        # jobs_202401 -> ('2024-01-01 00:00:00', '2024-02-01 00:00:00')
+        year, month = int(name[5:9]), int(name[9:11])
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return f'{year:04d}-{month:02d}-01 00:00:00', f'{next_year:04d}-{next_month:02d}-01 00:00:00'
+    
+    def _create_partition(self, cursor, name):
+        if self._object_type(cursor, name) == 'table':
+            return
+        
+        # Continue ids where the newest partition stopped, so ids stay unique across partitions
+        max_id = 0
+        for table in self._partition_tables(cursor):
+            max_id = max(max_id, cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0])
+        
+        self._create_jobs_table(cursor, name)
+        cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (name, max_id))
+        self._rebuild_jobs_view(cursor)
+    
+    def _current_partition(self, cursor):
+        name = 'jobs_' + datetime.utcnow().strftime('%Y%m')
+        self._create_partition(cursor, name)
+        return name
+    
+    def _migrate_to_partitions(self, cursor):
+        # One-off: move rows of the plain jobs_data table into monthly partitions
+        cursor.execute("SELECT DISTINCT strftime('%Y%m', COALESCE(created_at, CURRENT_TIMESTAMP)) FROM jobs_data")
+        periods = sorted(row[0] for row in cursor.fetchall())
+        
+        for period in periods:
+            name = f'jobs_{period}'
+            self._create_jobs_table(cursor, name)
+            cursor.execute(f'''
+                INSERT INTO {name} SELECT * FROM jobs_data
+                WHERE strftime('%Y%m', COALESCE(created_at, CURRENT_TIMESTAMP)) = ?
+            ''', (period,))
+        
+        cursor.execute('DROP VIEW IF EXISTS jobs')
+        cursor.execute('DROP TABLE jobs_data')
+        self._create_partition(cursor, 'jobs_' + datetime.utcnow().strftime('%Y%m'))
+        self._rebuild_jobs_view(cursor)
+    
+    def _recent_first(self, cursor, where, params, limit, offset=0):
+        # ORDER BY created_at DESC LIMIT/OFFSET that only reads as many partitions as it needs
+        wanted = limit + offset
+        rows = []
+        for table in self._job_tables(cursor, newest_first=True):
+            cursor.execute(f'SELECT * FROM ({self._decoded_select(table)}) WHERE {where} '
+                           f'ORDER BY created_at DESC LIMIT ?', params + [wanted - len(rows)])
+            rows.extend(dict(row) for row in cursor.fetchall())
+            if len(rows) >= wanted:
+                break
+        return rows[offset:offset + limit]
+    
+    def _insert_jobs(self, cursor, jobs):
         saved_count = 0
+        table = self._current_partition(cursor) if self.partition_by_month else 'jobs_data'
         
         for job in jobs:
             try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO jobs 
-                    (title, company, location, salary, summary, link, source, parsed_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                # UNIQUE(link) only covers one partition, check the others by hand
+                if self.partition_by_month and any(
+                        cursor.execute(f'SELECT 1 FROM {t} WHERE link = ?', (job['link'],)).fetchone()
+                        for t in self._partition_tables(cursor, newest_first=True)):
+                    continue
+                
+                cluster_id, band_keys = self.dedup.assign(cursor, job)
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO {table} 
+                    (title, company_id, location_id, salary, summary, link, source_id, parsed_at, cluster_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     job['title'],
-                    job['company'],
-                    job['location'],
+                    self.lookups.get_id(cursor, 'companies', job['company']),
+                    self.lookups.get_id(cursor, 'locations', normalize_location(job['location'])),
                     job['salary'],
                     job['summary'],
                     job['link'],
-                    job['source'],
-                    job['parsed_at']
+                    self.lookups.get_id(cursor, 'sources', job['source']),
+                    job['parsed_at'],
+                    cluster_id
                 ))
                 if cursor.rowcount > 0:
                     saved_count += 1
+                    self.dedup.remember(cursor, cluster_id, band_keys)
             except:
                 continue
         
+        return saved_count
+    
+    @staticmethod
+    def _normalize_query(query, location):
+        query_norm = ' '.join((query or '').lower().split())
+        location_norm = (normalize_location(location) or '').lower()
+        return query_norm, location_norm
+    
+    def _insert_search_history(self, cursor, query, location, sources, results_count, searched_at=None):
+        query_norm, location_norm = self._normalize_query(query, location)
+        searched_at = searched_at or datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        sources_json = json.dumps(sources)
+        
+        cursor.execute('''
+            INSERT INTO query_stats
+            (query_norm, location_norm, query, location, sources, hits, total_results, last_results, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+            ON CONFLICT (query_norm, location_norm) DO UPDATE SET
+                query = excluded.query,
+                location = excluded.location,
+                sources = excluded.sources,
+                hits = hits + 1,
+                total_results = total_results + excluded.total_results,
+                last_results = excluded.last_results,
+                last_seen = MAX(last_seen, excluded.last_seen)
+        ''', (query_norm, location_norm, query, location, sources_json,
+              results_count, results_count, searched_at, searched_at))
+        
+        cursor.execute('''
+            INSERT INTO query_stats_daily (day, query_norm, location_norm, hits, total_results)
+            VALUES (?, ?, ?, 1, ?)
+            ON CONFLICT (day, query_norm, location_norm) DO UPDATE SET
+                hits = hits + 1,
+                total_results = total_results + excluded.total_results
+        ''', (searched_at[:10], query_norm, location_norm, results_count))
+    
+    def _migrate_search_history(self, cursor):
+        # Fold the old per-search rows into the aggregates, then drop them
+        rows = cursor.execute(
+            'SELECT query, location, sources, results_count, search_date FROM search_history ORDER BY id'
+        ).fetchall()
+        for query, location, sources, results_count, search_date in rows:
+            try:
+                sources = json.loads(sources) if sources else []
+            except ValueError:
+                sources = []
+            self._insert_search_history(cursor, query, location, sources, results_count or 0, search_date)
+        cursor.execute('DROP TABLE search_history')
+    
+    @staticmethod
+    def _bump_version(cursor, name):
+        cursor.execute('''
+            INSERT INTO data_versions (name, version, updated_at) VALUES (?, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        ''', (name,))
+    
+    def get_data_version(self, name):
+        # name is 'jobs' or 'search_history'
+        conn = self._connect()
+        row = conn.execute('SELECT version, updated_at FROM data_versions WHERE name = ?', (name,)).fetchone()
+        conn.close()
+        
+        version, updated_at = row if row else (0, None)
+        return {'name': name, 'version': version, 'updated_at': updated_at}
+    
+    def save_jobs(self, jobs):
+        conn = self._connect()
+        cursor = conn.cursor()
+        saved_count = self._insert_jobs(cursor, jobs)
+        if saved_count:
+            self._bump_version(cursor, 'jobs')
+        
         conn.commit()
         conn.close()
         return saved_count
     
-    def get_all_jobs(self, limit=100, offset=0):
-        conn = sqlite3.connect(self.db_path)
+    def get_all_jobs(self, limit=100, offset=0, collapse=False):
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ? OFFSET ?', (limit, offset))
-        jobs = [dict(row) for row in cursor.fetchall()]
+        if collapse:
+            # One row per near-duplicate cluster: the newest posting plus where else it appeared
+            cursor.execute('''
+                SELECT j.*, c.duplicates, c.sources FROM jobs j
+                JOIN (
+                    SELECT MAX(id) AS id, COUNT(*) AS duplicates, GROUP_CONCAT(DISTINCT source) AS sources
+                    FROM jobs GROUP BY COALESCE(cluster_id, -id)
+                ) c ON c.id = j.id
+                ORDER BY j.created_at DESC LIMIT ? OFFSET ?
+            ''', (limit, offset))
+            jobs = [dict(row) for row in cursor.fetchall()]
+        else:
+            jobs = self._recent_first(cursor, '1=1', [], limit, offset)
         conn.close()
         
         return jobs
     
     def search_jobs(self, query="", location="", source="", min_salary=None):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        sql = "SELECT * FROM jobs WHERE 1=1"
+        where = "1=1"
         params = []
         
         if query:
-            sql += " AND (title LIKE ? OR summary LIKE ?)"
+            where += " AND (title LIKE ? OR summary LIKE ?)"
             params.extend([f"%{query}%", f"%{query}%"])
         
         if location:
-            sql += " AND location LIKE ?"
+            where += " AND location LIKE ?"
             params.append(f"%{location}%")
         
         if source:
-            sql += " AND source = ?"
+            where += " AND source = ?"
             params.append(source)
         
-        sql += " ORDER BY created_at DESC LIMIT 200"
-        
-        cursor.execute(sql, params)
-        jobs = [dict(row) for row in cursor.fetchall()]
+        jobs = self._recent_first(cursor, where, params, 200)
         conn.close()
         
         return jobs
     
+    def iter_jobs(self, source="", since=None, until=None, batch_size=1000):
+        # Stream jobs oldest first without loading the table into memory.
+        # StreamingResponse advances the generator on whichever pool thread is free, so the
+        # connection may not be tied to one thread; it is only ever used by this generator
+        conn = self._connect(check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        where = "1=1"
+        params = []
+        
+        if source:
+            where += " AND source = ?"
+            params.append(source)
+        
+        if since:
+            where += " AND created_at >= ?"
+            params.append(since)
+        
+        if until:
+            where += " AND created_at < ?"
+            params.append(until)
+        
+        try:
+            # Partitions are already in time order, so each one is sorted on its own
+            for table in self._job_tables(cursor):
+                if self.partition_by_month:
+                    start, end = self._partition_bounds(table)
+                    if (since and end <= since) or (until and start >= until):
+                        continue
+                
+                cursor.execute(f"SELECT * FROM ({self._decoded_select(table)}) WHERE {where} ORDER BY created_at",
+                               params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+        finally:
+            conn.close()
+    
     def get_statistics(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT COUNT(*) FROM jobs")
-        total = cursor.fetchone()[0]
+        tables = self._job_tables(cursor)
+        
+        total = sum(cursor.execute(f'SELECT COUNT(*) FROM {t}').fetchone()[0] for t in tables)
         
-        cursor.execute('SELECT source, COUNT(*) as count FROM jobs GROUP BY source')
-        by_source = {row[0]: row[1] for row in cursor.fetchall()}
+        # Group on the integer ids (covered by their indexes), then look the names up
+        def grouped(column, lookup, limit):
+            counts = ' UNION ALL '.join(
+                f'SELECT {column} AS ref, COUNT(*) AS cnt FROM {t} GROUP BY {column}' for t in tables)
+            cursor.execute(f'''
+                SELECT d.name, SUM(g.cnt) AS count FROM ({counts}) g
+                LEFT JOIN {lookup} d ON d.id = g.ref
+                GROUP BY g.ref ORDER BY count DESC LIMIT ?
+            ''', (limit,))
+            return {row[0]: row[1] for row in cursor.fetchall()}
         
-        cursor.execute('SELECT location, COUNT(*) as count FROM jobs GROUP BY location ORDER BY count DESC LIMIT 10')
-        by_location = {row[0]: row[1] for row in cursor.fetchall()}
+        by_source = grouped('source_id', 'sources', -1)
+        by_location = grouped('location_id', 'locations', 10)
         
         conn.close()
         
@@ -140,38 +584,320 @@ class JobDatabase:
     
     def save_search_history(self, query, location, 
                            sources, results_count):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
-        
-        sources_json = json.dumps(sources)
-        
-        cursor.execute('INSERT INTO search_history (query, location, sources, results_count) VALUES (?, ?, ?, ?)',
-                      (query, location, sources_json, results_count))
+        self._insert_search_history(cursor, query, location, sources, results_count)
+        self._bump_version(cursor, 'search_history')
         
         conn.commit()
         conn.close()
+    
+    def write_batch(self, items):
+        # Write queued ('jobs', jobs) and ('history', kwargs) items in one transaction
+        # Returns one result per item: saved count for jobs, None for history
+        conn = self._connect()
+        cursor = conn.cursor()
+        results = []
+        
+        try:
+            for kind, payload in items:
+                if kind == 'jobs':
+                    results.append(self._insert_jobs(cursor, payload))
+                else:
+                    self._insert_search_history(cursor, **payload)
+                    results.append(None)
+            
+            if any(kind == 'jobs' and saved for (kind, _), saved in zip(items, results)):
+                self._bump_version(cursor, 'jobs')
+            if any(kind != 'jobs' for kind, _ in items):
+                self._bump_version(cursor, 'search_history')
+            conn.commit()
+        except Exception:
+            # Names created in the rolled-back transaction must not stay cached
+            self.lookups.reset()
+            raise
+        finally:
+            conn.close()
+        
+        return results
      
     def get_search_history(self, limit=20):
-        conn = sqlite3.connect(self.db_path)
+        # Most recently searched queries, in the old search_history shape
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM search_history ORDER BY search_date DESC LIMIT ?', (limit,))
+        cursor.execute('''
+            SELECT rowid AS id, query, location, sources, last_results AS results_count,
+                   last_seen AS search_date, hits
+            FROM query_stats ORDER BY last_seen DESC LIMIT ?
+        ''', (limit,))
         
         history = [dict(row) for row in cursor.fetchall()]
         conn.close()
         
         return history
     
-    def clear_old_jobs(self, days=30):
-        conn = sqlite3.connect(self.db_path)
+    def get_top_queries(self, limit=10, days=None):
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        if days:
+            # Windowed ranking from the daily rollups
+            since = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d')
+            cursor.execute('''
+                SELECT q.query, q.location, SUM(d.hits) AS hits,
+                       ROUND(SUM(d.total_results) * 1.0 / SUM(d.hits), 1) AS avg_results, q.last_seen
+                FROM query_stats_daily d
+                JOIN query_stats q ON q.query_norm = d.query_norm AND q.location_norm = d.location_norm
+                WHERE d.day >= ?
+                GROUP BY d.query_norm, d.location_norm
+                ORDER BY hits DESC LIMIT ?
+            ''', (since, limit))
+        else:
+            # All-time ranking straight off the hits index
+            cursor.execute('''
+                SELECT query, location, hits, ROUND(total_results * 1.0 / hits, 1) AS avg_results, last_seen
+                FROM query_stats ORDER BY hits DESC LIMIT ?
+            ''', (limit,))
+        
+        top = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return top
+    
+    # ---------- Saved searches ----------
+    # A delta is "jobs first seen after a (created_at, id) position". It reads
+    # idx_*_created_at forward from the position, oldest partition first,
+    # so a poll with nothing new touches a handful of index entries
+    
+    def _latest_position(self, cursor):
+        # (created_at, id) of the newest job row, ('', 0) for an empty table
+        for table in self._job_tables(cursor, newest_first=True):
+            row = cursor.execute(f'SELECT created_at, id FROM {table} '
+                                 f'ORDER BY created_at DESC, id DESC LIMIT 1').fetchone()
+            if row:
+                return row[0], row[1]
+        return '', 0
+    
+    @staticmethod
+    def _saved_search_dict(row):
+        search = dict(row)
+        search['sources'] = json.loads(search['sources']) if search['sources'] else []
+        search['cursor'] = encode_cursor((search.pop('cursor_created_at'), search.pop('cursor_id')))
+        return search
+    
+    def create_saved_search(self, query, location="", sources=None, salary=None, experience="all", name=None):
+        # Starts at the newest job, so the first delta only has jobs seen after saving
+        conn = self._connect()
+        cursor = conn.cursor()
+        created_at, job_id = self._latest_position(cursor)
+        cursor.execute('''
+            INSERT INTO saved_searches
+            (name, query, location, sources, salary, experience, cursor_created_at, cursor_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (name or query, query, location, json.dumps(sources or []), salary, experience, created_at, job_id))
+        search_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        
+        return self.get_saved_search(search_id)
+    
+    def get_saved_search(self, search_id):
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        row = conn.execute('SELECT * FROM saved_searches WHERE id = ?', (search_id,)).fetchone()
+        conn.close()
+        
+        return self._saved_search_dict(row) if row else None
+    
+    def list_saved_searches(self):
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute('SELECT * FROM saved_searches ORDER BY id').fetchall()
+        conn.close()
+        
+        return [self._saved_search_dict(row) for row in rows]
+    
+    def delete_saved_search(self, search_id):
+        conn = self._connect()
+        deleted = conn.execute('DELETE FROM saved_searches WHERE id = ?', (search_id,)).rowcount
+        conn.commit()
+        conn.close()
+        
+        return deleted > 0
+    
+    def get_new_jobs(self, search, after=None, limit=100, source_names=None):
+        """Jobs matching a saved search first seen after `after` (default: its watermark), oldest first.
+        
+        Returns (jobs, next position, has_more) and moves the saved search's watermark forward.
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute('DELETE FROM jobs WHERE created_at < datetime("now", "-" || ? || " days")', (days,))
+        after_at, after_id = after or decode_cursor(search['cursor'])
+        # Rows committed after this point are left for the next poll, so none are skipped
+        latest_at, latest_id = self._latest_position(cursor)
+        
+        # Row values match the index order (created_at, rowid): one range scan, no sort
+        where = "(created_at, id) > (?, ?) AND (created_at, id) <= (?, ?)"
+        params = [after_at, after_id, latest_at, latest_id]
         
-        deleted = cursor.rowcount
+        for word in (search['query'] or '').split():
+            where += " AND (title LIKE ? OR summary LIKE ?)"
+            params.extend([f"%{word}%", f"%{word}%"])
         
+        location = normalize_location(search.get('location'))
+        if location:
+            where += " AND location LIKE ?"
+            params.append(f"%{location}%")
+        
+        if source_names:
+            where += f" AND source IN ({', '.join('?' * len(source_names))})"
+            params.extend(source_names)
+        
+        jobs = []
+        for table in self._job_tables(cursor):
+            if self.partition_by_month and after_at and self._partition_bounds(table)[1] <= after_at:
+                continue
+            cursor.execute(f"SELECT * FROM ({self._decoded_select(table)}) WHERE {where} "
+                           f"ORDER BY created_at, id LIMIT ?", params + [limit - len(jobs)])
+            jobs.extend(dict(row) for row in cursor.fetchall())
+            if len(jobs) >= limit:
+                break
+        
+        has_more = len(jobs) >= limit
+        if has_more:
+            position = (jobs[-1]['created_at'], jobs[-1]['id'])
+        else:
+            # Everything up to the newest row has been looked at, matching or not
+            position = max((latest_at, latest_id), (after_at, after_id))
+        
+        # The watermark only moves forward, also when a client replays an older cursor
+        cursor.execute('''
+            UPDATE saved_searches SET
+                cursor_created_at = CASE WHEN cursor_created_at IS NULL OR cursor_created_at < ?
+                    OR (cursor_created_at = ? AND cursor_id < ?) THEN ? ELSE cursor_created_at END,
+                cursor_id = CASE WHEN cursor_created_at IS NULL OR cursor_created_at < ?
+                    OR (cursor_created_at = ? AND cursor_id < ?) THEN ? ELSE cursor_id END,
+                last_polled_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (position[0], position[0], position[1], position[0],
+              position[0], position[0], position[1], position[1], search['id']))
         conn.commit()
         conn.close()
         
+        return jobs, position, has_more
+    
+    def purge_batch(self, cutoff, batch_size=500):
+        # Delete at most batch_size jobs created before cutoff, oldest first
+        conn = self._connect()
+        cursor = conn.cursor()
+        deleted = 0
+        tables = self._job_tables(cursor)
+        
+        if self.partition_by_month:
+            # Whole expired months are dropped outright, only the boundary month is trimmed
+            current = self._current_partition(cursor)
+            tables = []
+            for table in self._partition_tables(cursor):
+                start, end = self._partition_bounds(table)
+                if end <= cutoff and table != current:
+                    deleted += cursor.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                    cursor.execute(f'DROP TABLE {table}')
+                    self._rebuild_jobs_view(cursor)
+                elif start < cutoff:
+                    tables.append(table)
+        
+        for table in tables:
+            if deleted >= batch_size:
+                break
+            cursor.execute(f'''
+                DELETE FROM {table} WHERE id IN (
+                    SELECT id FROM {table} WHERE created_at < ? ORDER BY created_at LIMIT ?
+                )
+            ''', (cutoff, batch_size - deleted))
+            deleted += cursor.rowcount
+        
+        if deleted:
+            self._bump_version(cursor, 'jobs')
+        
+        # Daily query rollups follow the same retention; windowed top queries change with them
+        cursor.execute('DELETE FROM query_stats_daily WHERE day < ?', (cutoff[:10],))
+        if cursor.rowcount > 0:
+            self._bump_version(cursor, 'search_history')
+        
+        conn.commit()
+        
+        # LSH bands not refreshed by any job since the cutoff are stale too; there can be
+        # many per job, so they are cleared in batches of their own, one commit each
+        while True:
+            cursor.execute('''
+                DELETE FROM job_lsh WHERE band_key IN (
+                    SELECT band_key FROM job_lsh WHERE seen_at < ? LIMIT ?
+                )
+            ''', (cutoff, batch_size))
+            removed = cursor.rowcount
+            conn.commit()
+            if removed < batch_size:
+                break
+        
+        conn.close()
+        
+        return deleted
+    
+    def clear_old_jobs(self, days=30, batch_size=500):
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        deleted = 0
+        
+        while True:
+            batch = self.purge_batch(cutoff, batch_size)
+            deleted += batch
+            if batch < batch_size:
+                break
+        
         return deleted
+    
+    def enable_incremental_vacuum(self):
+        # Databases created before auto_vacuum was set need one full VACUUM
+        conn = self._connect()
+        mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        if mode != 2:
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('VACUUM')
+        conn.close()
+    
+    def incremental_vacuum(self, pages=1000):
+        # Return up to `pages` free pages to the OS, returns (pages freed, free pages left)
+        conn = self._connect()
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        # executescript steps the pragma to completion (execute frees one page)
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        # Move the vacuumed pages out of the WAL so the file actually shrinks
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        
+        # Refresh planner statistics for indexes touched by the purge
+        conn.execute('PRAGMA optimize')
+        conn.close()
+        
+        return before - after, after
+
+
+def encode_cursor(position):
+    # (created_at, id) -> opaque URL-safe token
+    created_at, job_id = position
+    raw = f"{created_at or ''}|{job_id or 0}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    # Inverse of encode_cursor; ValueError for anything else
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+        created_at, job_id = raw.rsplit('|', 1)
+        return created_at, int(job_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {token!r}")
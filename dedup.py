@@ -0,0 +1,142 @@
+# ==================== dedup.py ====================
+# Near-duplicate detection across job boards
+# MinHash over normalized title/company/location shingles, banded for LSH lookups.
+# Band keys include the exact normalized company and city, so only postings of the
+# same employer in the same place can be clustered
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+
+
+# 4 bands of 8 rows: pairs collide reliably from a Jaccard similarity of about 0.8
+NUM_PERM = 32
+BANDS = 4
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 63) - 1
+
+# Fixed seed so signatures (and stored band keys) are stable across processes
+_rng = random.Random(20240601)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_GENDER_TAG = re.compile(r'\(\s*(?:[mwdfx]\s*/\s*)+[mwdfx]\s*\)|\(\s*all genders?\s*\)|\(\s*gn\s*\)')
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_COMPANY_NOISE = {'gmbh', 'mbh', 'ag', 'se', 'kg', 'co', 'ug', 'inc', 'ltd', 'llc', 'plc', 'the'}
+_EMPTY = {'', 'not specified'}
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big') & _MASK
+
+
+def normalize(text):
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = _GENDER_TAG.sub(' ', text)
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+def _company(job):
+    return [w for w in normalize(job.get('company')).split() if w not in _COMPANY_NOISE]
+
+
+def _city(job):
+    # Only the city part of "Berlin, Germany" / "Berlin-Mitte" matters
+    return normalize((job.get('location') or '').split(',')[0]).split()[:1]
+
+
+def identity(job):
+    # Exact part of the match: same employer and city (or both unknown)
+    company = ' '.join(_company(job))
+    return f"{'' if company in _EMPTY else company}|{' '.join(_city(job))}"
+
+
+def shingles(job):
+    title = normalize(job.get('title')).split()
+    company = _company(job)
+    location = _city(job)
+
+    result = {'t:' + w for w in title}
+    result.update('tt:' + a + '_' + b for a, b in zip(title, title[1:]))
+    if ' '.join(company) not in _EMPTY:
+        result.update('c:' + w for w in company)
+    result.update('l:' + w for w in location)
+    return result
+
+
+def signature(job):
+    hashes = [_hash64(s) for s in shingles(job)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def band_keys(job):
+    sig = signature(job)
+    if sig is None:
+        return []
+    prefix = identity(job).encode('utf-8')
+    keys = []
+    for band in range(BANDS):
+        chunk = prefix + struct.pack(f'>B{ROWS}Q', band, *sig[band * ROWS:(band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'big') & _MASK)
+    return keys
+
+
+class NearDuplicateIndex:
+    # Band keys live in the job_lsh table, so lookups are primary-key probes
+    # and every process sharing the database sees the same clusters
+
+    def assign(self, cursor, job):
+        # Returns (cluster_id, band_keys); cluster_id is None for jobs without shingles
+        keys = band_keys(job)
+        if not keys:
+            return None, keys
+
+        cursor.execute(
+            f'SELECT cluster_id FROM job_lsh WHERE band_key IN ({",".join("?" * len(keys))}) LIMIT 1',
+            keys
+        )
+        row = cursor.fetchone()
+        if row:
+            return row[0], keys
+
+        # New cluster, id derived from the first member's bands
+        return keys[0], keys
+
+    def remember(self, cursor, cluster_id, keys):
+        cursor.executemany(
+            'INSERT OR REPLACE INTO job_lsh (band_key, cluster_id, seen_at) VALUES (?, ?, CURRENT_TIMESTAMP)',
+            [(key, cluster_id) for key in keys]
+        )
+
+
+def collapse_jobs(jobs):
+    # Keep the first job of each near-duplicate group, noting where else it was posted
+    groups = []
+    owner = {}
+
+    for job in jobs:
+        keys = band_keys(job)
+        group = next((owner[k] for k in keys if k in owner), None)
+        if group is None:
+            group = len(groups)
+            groups.append([job])
+        else:
+            groups[group].append(job)
+        for key in keys:
+            owner.setdefault(key, group)
+
+    collapsed = []
+    for members in groups:
+        job = dict(members[0])
+        job['duplicates'] = len(members)
+        job['also_on'] = [{'source': m['source'], 'link': m['link']} for m in members[1:]]
+        collapsed.append(job)
+    return collapsed
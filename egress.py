@@ -0,0 +1,210 @@
+# ==================== egress.py ====================
+# Pool of outbound routes (direct, HTTP proxies, local source addresses) for board requests
+# Each route has its own per-host rate limit and health; routes answering 403 cool down
+
+import logging
+import os
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import EGRESS_REQUESTS, EGRESS_ROUTE_HEALTHY
+
+
+logger = logging.getLogger(__name__)
+
+
+class SourceAddressAdapter(HTTPAdapter):
+    """Binds outgoing connections to one local address"""
+
+    def __init__(self, source_address, **kwargs):
+        self.source_address = (source_address, 0)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['source_address'] = self.source_address
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs['source_address'] = self.source_address
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+class Route:
+
+    def __init__(self, name, proxy=None, source_address=None):
+        self.name = name
+        self.proxy = proxy
+        self.source_address = source_address
+        self.proxies = {'http': proxy, 'https': proxy} if proxy else None
+        self.strikes = 0
+        self.cooldown_until = 0.0
+        self.stats = {'requests': 0, 'blocked': 0, 'errors': 0}
+        # Caller session -> clone whose connections leave from source_address
+        self._clones = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self):
+        return time.time() >= self.cooldown_until
+
+    def slot_key(self, host):
+        # The direct route keeps the plain host key, so one-route setups behave as before
+        return host if self.name == 'direct' else f'{host}@{self.name}'
+
+    def session_for(self, session):
+        if self.source_address is None:
+            return session
+        with self._lock:
+            clone = self._clones.get(session)
+            if clone is None:
+                clone = requests.Session()
+                # Same headers and cookie jar as the caller's session, other local address
+                clone.headers = session.headers
+                clone.cookies = session.cookies
+                adapter = SourceAddressAdapter(self.source_address,
+                                               max_retries=session.get_adapter('https://').max_retries)
+                clone.mount('http://', adapter)
+                clone.mount('https://', adapter)
+                self._clones[session] = clone
+        return clone
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'healthy': self.healthy,
+            'strikes': self.strikes,
+            'cooldown_seconds': round(max(0.0, self.cooldown_until - time.time()), 1),
+            **self.stats,
+        }
+
+
+def parse_routes(spec):
+    """EGRESS_ROUTES syntax: comma-separated 'direct', proxy URLs and 'source:<local ip>'"""
+    routes = []
+    for item in (part.strip() for part in (spec or '').split(',')):
+        if not item:
+            continue
+        if item == 'direct':
+            routes.append(Route('direct'))
+        elif item.startswith('source:'):
+            routes.append(Route(item, source_address=item[len('source:'):]))
+        elif '://' in item:
+            routes.append(Route(item.split('://', 1)[1].rstrip('/'), proxy=item))
+        else:
+            raise ValueError(f"Unknown egress route: {item!r}")
+    return routes or [Route('direct')]
+
+
+class EgressPool:
+
+    def __init__(self, routes=None, shared_state=None, interval=0.0, cooldown=None, max_strikes=None,
+                 block_statuses=(403,)):
+        self.routes = routes or parse_routes(os.getenv('EGRESS_ROUTES', 'direct'))
+        # Per-host spacing of requests on each route; shared by all workers when shared_state is set
+        self.shared_state = shared_state
+        self.interval = interval
+        # A route with max_strikes blocked answers in a row sits out `cooldown` seconds
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv('EGRESS_COOLDOWN', 600))
+        self.max_strikes = max_strikes or int(os.getenv('EGRESS_MAX_403', 2))
+        self.block_statuses = block_statuses
+        self._local_slots = {}
+        self._lock = threading.Lock()
+        for route in self.routes:
+            EGRESS_ROUTE_HEALTHY.set(1, route=route.name)
+        if len(self.routes) > 1:
+            logger.info(f"🌐 Egress routes: {', '.join(route.name for route in self.routes)}")
+
+    @property
+    def size(self):
+        return len(self.routes)
+
+    # ---------- Per-route rate limit ----------
+
+    def _backlog(self, key):
+        if self.shared_state is not None:
+            return self.shared_state.host_backlog(key)
+        with self._lock:
+            return max(0.0, self._local_slots.get(key, 0.0) - time.time())
+
+    def _reserve(self, key):
+        if self.interval <= 0:
+            return 0.0
+        if self.shared_state is not None:
+            return self.shared_state.reserve_host_slot(key, self.interval)
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._local_slots.get(key, 0.0))
+            self._local_slots[key] = slot + self.interval
+            return slot - now
+
+    def _candidates(self):
+        healthy = [route for route in self.routes if route.healthy]
+        if healthy:
+            return healthy
+        # Every route is cooling down: the one back soonest is better than not crawling at all
+        return [min(self.routes, key=lambda route: route.cooldown_until)]
+
+    def backlog(self, host):
+        """Seconds until the earliest free slot for host on any usable route"""
+        return min(self._backlog(route.slot_key(host)) for route in self._candidates())
+
+    def acquire(self, host):
+        """Pick the usable route with the earliest free slot for host and wait for it; returns (route, waited)"""
+        candidates = self._candidates()
+        if len(candidates) == 1:
+            route = candidates[0]
+        else:
+            route = min(candidates, key=lambda r: (self._backlog(r.slot_key(host)), r.stats['requests']))
+        wait = self._reserve(route.slot_key(host))
+        if wait > 0:
+            time.sleep(wait)
+        return route, max(wait, 0.0)
+
+    # ---------- Sending and health ----------
+
+    def send(self, route, session, method, url, **kwargs):
+        if route.proxies:
+            kwargs.setdefault('proxies', route.proxies)
+        with self._lock:
+            route.stats['requests'] += 1
+        try:
+            response = route.session_for(session).request(method, url, **kwargs)
+        except Exception:
+            self.report(route, None)
+            raise
+        self.report(route, response.status_code)
+        return response
+
+    def request(self, session, method, url, **kwargs):
+        route, _ = self.acquire(requests.utils.urlparse(url).netloc)
+        return self.send(route, session, method, url, **kwargs)
+
+    def report(self, route, status):
+        # status None = connection error (dead proxy, refused, timeout)
+        if status is not None and status not in self.block_statuses:
+            EGRESS_REQUESTS.inc(route=route.name, outcome='ok')
+            route.strikes = 0
+            return
+
+        outcome = 'error' if status is None else 'blocked'
+        EGRESS_REQUESTS.inc(route=route.name, outcome=outcome)
+        with self._lock:
+            route.stats['errors' if status is None else 'blocked'] += 1
+            route.strikes += 1
+            if route.strikes < self.max_strikes or not route.healthy:
+                return
+            route.cooldown_until = time.time() + self.cooldown
+            route.strikes = 0
+        EGRESS_ROUTE_HEALTHY.set(0, route=route.name)
+        logger.warning(f"🚫 Egress route {route.name} out of rotation for {self.cooldown:.0f}s "
+                       f"({self.max_strikes} x {status or 'connection error'})")
+
+    def stats(self):
+        for route in self.routes:
+            EGRESS_ROUTE_HEALTHY.set(1 if route.healthy else 0, route=route.name)
+        return {'routes': [route.to_dict() for route in self.routes], 'interval': self.interval,
+                'cooldown': self.cooldown, 'max_strikes': self.max_strikes}
@@ -0,0 +1,170 @@
+# ==================== export.py ====================
+# Streams the jobs table out as NDJSON, CSV or Parquet
+# Rows come from a server-side cursor, so memory stays flat for any export size
+#
+# Usage: python export.py --format csv --source Indeed --since 2024-01-01 --out jobs.csv
+
+import argparse
+import csv
+import io
+import json
+import sys
+
+from database import JobDatabase
+
+
+COLUMNS = ['id', 'title', 'company', 'location', 'salary', 'summary',
+           'link', 'source', 'parsed_at', 'created_at', 'cluster_id']
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Rows buffered before a chunk is handed to the consumer
+CHUNK_ROWS = 500
+
+
+def export_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({col: row.get(col) for col in COLUMNS}, ensure_ascii=False))
+        if len(lines) >= CHUNK_ROWS:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    count = 0
+
+    for row in rows:
+        writer.writerow([row.get(col) for col in COLUMNS])
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink:
+    # Minimal writable file that hands out whatever was written since the last drain
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _load_pyarrow():
+    # Imported on the first Parquet export rather than at startup
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Parquet export requires pyarrow (pip install pyarrow)')
+    return pa, pq
+
+
+def export_parquet(rows, row_group_size=10000):
+    pa, pq = _load_pyarrow()
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('title', pa.string()),
+        ('company', pa.string()),
+        ('location', pa.string()),
+        ('salary', pa.string()),
+        ('summary', pa.string()),
+        ('link', pa.string()),
+        ('source', pa.string()),
+        ('parsed_at', pa.string()),
+        ('created_at', pa.string()),
+        ('cluster_id', pa.int64()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+
+    # One row group per batch, flushed to the consumer as soon as it is written
+    batch = {col: [] for col in COLUMNS}
+    size = 0
+    for row in rows:
+        for col in COLUMNS:
+            batch[col].append(row.get(col))
+        size += 1
+        if size >= row_group_size:
+            writer.write_table(pa.table(batch, schema=schema))
+            batch = {col: [] for col in COLUMNS}
+            size = 0
+            yield sink.drain()
+
+    if size:
+        writer.write_table(pa.table(batch, schema=schema))
+    writer.close()
+    yield sink.drain()
+
+
+EXPORTERS = {
+    'ndjson': export_ndjson,
+    'csv': export_csv,
+    'parquet': export_parquet,
+}
+
+
+def export_jobs(db, fmt='ndjson', source="", since=None, until=None):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{fmt}', use one of: {', '.join(EXPORTERS)}")
+    if fmt == 'parquet':
+        _load_pyarrow()
+    return EXPORTERS[fmt](db.iter_jobs(source=source, since=since, until=until))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Export jobs from jobs.db')
+    arg_parser.add_argument('--db', default='jobs.db', help='Path to the SQLite database')
+    arg_parser.add_argument('--format', default='ndjson', choices=list(EXPORTERS))
+    arg_parser.add_argument('--source', default='', help='Only jobs from this source, e.g. Indeed')
+    arg_parser.add_argument('--since', help='Created at or after (YYYY-MM-DD[ HH:MM:SS])')
+    arg_parser.add_argument('--until', help='Created before (YYYY-MM-DD[ HH:MM:SS])')
+    arg_parser.add_argument('--out', help='Output file (default: stdout)')
+    args = arg_parser.parse_args()
+
+    chunks = export_jobs(JobDatabase(args.db), args.format, args.source, args.since, args.until)
+    out = open(args.out, 'wb') if args.out else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
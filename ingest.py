@@ -0,0 +1,213 @@
+# ==================== ingest.py ====================
+# Write-behind queue for jobs and search history
+# Producers enqueue rows, one writer thread commits them in batches
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import DB_COMMIT_SECONDS
+from tracing import current_span
+
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the queue on shutdown
+_STOP = object()
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+def _deliver(future, result=None, exception=None):
+    # The producer may have given up (client disconnected, asyncio task cancelled),
+    # which cancels the future; resolving it then would raise and kill the writer
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not deliver ingest result: {e}")
+
+
+class IngestQueue:
+
+    def __init__(self, db, max_size=None, batch_size=None, max_delay=None, put_timeout=5.0):
+        self.db = db
+        self.max_size = max_size or int(os.getenv('INGEST_QUEUE_SIZE', 1000))
+        # A batch is committed once it holds batch_size rows or max_delay seconds passed
+        self.batch_size = batch_size or int(os.getenv('INGEST_BATCH_SIZE', 500))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv('INGEST_MAX_DELAY', 0.05))
+        # How long producers wait for room before giving up
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=self.max_size)
+        self._closed = False
+        # Set once the writer has failed what was left behind _STOP
+        self._drained = False
+        self._drain_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'rejected': 0,
+            'written_rows': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'commit_seconds_total': 0.0,
+            'commit_seconds_max': 0.0,
+            'commit_seconds_last': 0.0,
+        }
+
+        # Started on first use: a writer started before a worker process forks
+        # would not exist in the child
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            # A writer that died (or was left behind by a fork) is replaced
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _put(self, kind, payload, rows):
+        if self._closed:
+            raise IngestQueueFull('Ingest queue is closed')
+        self._ensure_writer()
+
+        future = Future()
+        try:
+            # The producer's span (if traced) gets a child for the commit that wrote this item
+            self._queue.put((kind, payload, rows, future, current_span()), timeout=self.put_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            raise IngestQueueFull(f'Ingest queue full ({self.max_size} items)')
+
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+        if self._closed:
+            # Raced with close(): the writer may already have stopped behind _STOP
+            with self._drain_lock:
+                if self._drained:
+                    self._fail_leftovers()
+        return future
+
+    def enqueue_jobs(self, jobs):
+        # Future resolves to the number of newly saved jobs once committed
+        # A list is queued as is; the producer hands it over and does not change it afterwards
+        if not isinstance(jobs, list):
+            jobs = list(jobs)
+        return self._put('jobs', jobs, max(len(jobs), 1))
+
+    def enqueue_search_history(self, query, location, sources, results_count):
+        payload = {
+            'query': query,
+            'location': location,
+            'sources': sources,
+            'results_count': results_count,
+        }
+        return self._put('history', payload, 1)
+
+    def _next_batch(self):
+        # Block for the first item, then gather more until the batch is full or late
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+
+        batch = [first]
+        rows = first[2]
+        deadline = time.monotonic() + self.max_delay
+
+        while rows < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            rows += item[2]
+
+        return batch, False
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            results = self.db.write_batch([(kind, payload) for kind, payload, _, _, _ in batch])
+        except Exception as e:
+            logger.error(f"❌ Ingest batch of {len(batch)} items failed: {e}")
+            with self._stats_lock:
+                self._stats['failed_batches'] += 1
+            for _, _, _, future, _ in batch:
+                _deliver(future, exception=e)
+            return
+
+        finished = time.perf_counter()
+        elapsed = finished - started
+        DB_COMMIT_SECONDS.observe(elapsed, operation='ingest_batch')
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['written_rows'] += sum(item[2] for item in batch)
+            self._stats['commit_seconds_total'] += elapsed
+            self._stats['commit_seconds_last'] = elapsed
+            self._stats['commit_seconds_max'] = max(self._stats['commit_seconds_max'], elapsed)
+
+        for (kind, _, _, future, parent), result in zip(batch, results):
+            if parent is not None:
+                parent.add_child('db.write_batch', started, finished, kind=kind, batch_items=len(batch))
+            _deliver(future, result=result)
+
+    def _fail_leftovers(self):
+        # Items queued behind _STOP will never be written
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                _deliver(item[3], exception=IngestQueueFull('Ingest queue is closed'))
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self._write(batch)
+            if stop:
+                break
+        with self._drain_lock:
+            self._fail_leftovers()
+            self._drained = True
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['max_size'] = self.max_size
+        stats['commit_seconds_avg'] = (stats['commit_seconds_total'] / stats['batches']
+                                       if stats['batches'] else 0.0)
+        return stats
+
+    def close(self, timeout=30):
+        # Stop accepting work, then let the writer drain what is already queued;
+        # items that land behind _STOP fail with IngestQueueFull instead of hanging
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        logger.info(f"💾 Ingest queue flushed ({self._stats['written_rows']} rows written)")
@@ -0,0 +1,78 @@
+# ==================== job_record.py ====================
+# Compact job records: one slotted object per posting, with the fields every job
+# of a result page shares (source, parse time, recency) stored once per page
+
+from collections.abc import Mapping
+from datetime import datetime
+
+
+class JobPage:
+    """Fields shared by all jobs extracted from one result page"""
+
+    __slots__ = ('source', 'parsed_at', 'posted_date', 'is_recent')
+
+    def __init__(self, source, parsed_at=None, posted_date='recent', is_recent=True):
+        self.source = source
+        # Formatted once per page instead of once per card
+        self.parsed_at = parsed_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.posted_date = posted_date
+        self.is_recent = is_recent
+
+
+class JobRecord(Mapping):
+    """Read-only job that behaves like the old job dict (job['title'], job.get(...), dict(job))"""
+
+    __slots__ = ('title', 'company', 'location', 'salary', 'summary', 'link', 'page')
+
+    # Key order of the old dicts, which is also the order of API responses
+    KEYS = ('title', 'company', 'location', 'salary', 'summary', 'link',
+            'source', 'posted_date', 'is_recent', 'parsed_at')
+    _OWN = frozenset(('title', 'company', 'location', 'salary', 'summary', 'link'))
+    _SHARED = frozenset(JobPage.__slots__)
+
+    def __init__(self, page, title, company, location, salary, summary, link):
+        self.page = page
+        self.title = title
+        self.company = company
+        self.location = location
+        self.salary = salary
+        self.summary = summary
+        self.link = link
+
+    def __getitem__(self, key):
+        if key in self._OWN:
+            return getattr(self, key)
+        if key in self._SHARED:
+            return getattr(self.page, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return f'JobRecord({self.page.source}: {self.title!r} @ {self.company!r})'
+
+    def to_dict(self):
+        page = self.page
+        return {
+            'title': self.title,
+            'company': self.company,
+            'location': self.location,
+            'salary': self.salary,
+            'summary': self.summary,
+            'link': self.link,
+            'source': page.source,
+            'posted_date': page.posted_date,
+            'is_recent': page.is_recent,
+            'parsed_at': page.parsed_at,
+        }
+
+
+def json_default(obj):
+    # default= hook for json/orjson, which only know real dicts
+    if isinstance(obj, JobRecord):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
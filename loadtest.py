@@ -0,0 +1,603 @@
+# ==================== loadtest.py ====================
+# Load test for the API against a local stand-in job board
+# Starts a fake Indeed/LinkedIn/StepStone/EURES server, points the parser at it,
+# sends a request mix at a fixed rate and reports throughput and latency percentiles
+#
+# Usage: python loadtest.py --rate 20 --duration 30 --save-baseline loadtest_baseline.json
+#        python loadtest.py --rate 20 --duration 30 --baseline loadtest_baseline.json
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+QUERIES = ['python developer', 'data engineer', 'devops engineer', 'frontend developer',
+           'java developer', 'product manager', 'qa engineer', 'data scientist']
+LOCATIONS = ['Berlin', 'München', 'Hamburg', 'Köln', 'Frankfurt am Main', 'Stuttgart', 'Leipzig']
+SOURCES = ['indeed', 'linkedin', 'stepstone']
+COMPANIES = ['Zalando', 'SAP', 'Siemens', 'Delivery Hero', 'N26', 'Celonis', 'Personio',
+             'HelloFresh', 'Trivago', 'Allianz', 'BMW', 'Otto Group']
+LEVELS = ['', 'Junior ', 'Senior ', 'Lead ', 'Working Student ']
+
+
+# ---------- Stand-in job board ----------
+
+def _fake_jobs(key, query, location, count):
+    # Same page -> same jobs, so repeated searches hit the dedup/UNIQUE paths like real ones
+    rng = random.Random(zlib.crc32(key.encode('utf-8')))
+    jobs = []
+    for i in range(count):
+        job_id = f'{zlib.crc32(f"{key}:{i}".encode("utf-8")):08x}'
+        salary_from = rng.randrange(40, 90) * 1000
+        jobs.append({
+            'id': job_id,
+            'title': f'{rng.choice(LEVELS)}{query.title()} ({rng.choice(["m/w/d", "all genders"])})',
+            'company': rng.choice(COMPANIES),
+            'location': location,
+            'salary': f'€{salary_from:,} - €{salary_from + 15000:,}' if rng.random() < 0.5 else '',
+            'summary': f'{query.title()} role in {location}. ' * rng.randrange(2, 6),
+        })
+    return jobs
+
+
+def _render_indeed(jobs):
+    return ''.join(
+        f'<div class="job_seen_beacon"><h2 class="jobTitle"><a data-jk="{j["id"]}" id="job_{j["id"]}">'
+        f'{j["title"]}</a></h2><span data-testid="company-name">{j["company"]}</span>'
+        f'<div data-testid="text-location">{j["location"]}</div>'
+        f'<div class="salary-snippet">{j["salary"]}</div>'
+        f'<div class="job-snippet">{j["summary"]}</div></div>'
+        for j in jobs)
+
+
+def _render_linkedin(jobs):
+    return ''.join(
+        f'<div class="base-card"><a class="base-card__full-link" '
+        f'href="https://www.linkedin.com/jobs/view/{j["id"]}?trk=public_jobs"></a>'
+        f'<h3 class="base-search-card__title">{j["title"]}</h3>'
+        f'<h4 class="base-search-card__subtitle">{j["company"]}</h4>'
+        f'<span class="job-search-card__location">{j["location"]}</span>'
+        f'<span class="job-search-card__salary-info">{j["salary"]}</span></div>'
+        for j in jobs)
+
+
+def _render_stepstone(jobs):
+    return ''.join(
+        f'<article data-at="job-item"><a data-at="job-item-title" href="/stellenangebote--{j["id"]}">'
+        f'{j["title"]}</a><a data-at="job-item-company-name">{j["company"]}</a>'
+        f'<span data-at="job-item-location">{j["location"]}</span><span>{j["salary"]}</span>'
+        f'<div data-at="job-item-description">{j["summary"]}</div></article>'
+        for j in jobs)
+
+
+def _render_eures(jobs):
+    return ''.join(f'<article class="job-result"><h3>{j["title"]}</h3><p>{j["summary"]}</p></article>'
+                   for j in jobs)
+
+
+_RENDERERS = {'indeed': _render_indeed, 'linkedin': _render_linkedin,
+              'stepstone': _render_stepstone, 'eures': _render_eures}
+
+
+def _script_json(value):
+    # JSON inside <script> must not contain "</"
+    return json.dumps(value, ensure_ascii=False).replace('</', '<\\/')
+
+
+def _monetary_amount(salary):
+    # '€45,000 - €60,000' -> schema.org MonetaryAmount
+    low, high = (int(part.strip(' €').replace(',', '')) for part in salary.split('-'))
+    return {'@type': 'MonetaryAmount', 'currency': 'EUR',
+            'value': {'@type': 'QuantitativeValue', 'minValue': low, 'maxValue': high, 'unitText': 'YEAR'}}
+
+
+def _embedded_data(source, jobs):
+    # The listings again as the real boards embed them: hydration state or JSON-LD
+    if source == 'indeed':
+        results = [{'jobkey': j['id'], 'displayTitle': j['title'], 'company': j['company'],
+                    'formattedLocation': j['location'], 'snippet': f'<ul><li>{j["summary"]}</li></ul>',
+                    **({'salarySnippet': {'text': j['salary']}} if j['salary'] else {})} for j in jobs]
+        state = {'metaData': {'mosaicProviderJobCardsModel': {'results': results}}}
+        return f'<script>window.mosaic.providerData["mosaic-provider-jobcards"]={_script_json(state)};</script>'
+    if source == 'stepstone':
+        items = [{'id': j['id'], 'title': j['title'], 'url': f'/stellenangebote--{j["id"]}',
+                  'companyName': j['company'], 'location': j['location'], 'salary': j['salary'],
+                  'textSnippet': j['summary']} for j in jobs]
+        state = {'searchResults': {'items': items, 'totalCount': len(items)}}
+        return f'<script>window.__PRELOADED_STATE__["app-unifiedResultlist"] = {_script_json(state)};</script>'
+    if source == 'linkedin':
+        postings = [{'@type': 'JobPosting', 'title': j['title'], 'description': j['summary'],
+                     'hiringOrganization': {'@type': 'Organization', 'name': j['company']},
+                     'jobLocation': {'@type': 'Place', 'address': {'addressLocality': j['location']}},
+                     'url': f'https://www.linkedin.com/jobs/view/{j["id"]}',
+                     **({'baseSalary': _monetary_amount(j['salary'])} if j['salary'] else {})} for j in jobs]
+        document = {'@context': 'https://schema.org', '@type': 'ItemList',
+                    'itemListElement': [{'@type': 'ListItem', 'position': i + 1, 'item': p}
+                                        for i, p in enumerate(postings)]}
+        return f'<script type="application/ld+json">{_script_json(document)}</script>'
+    return ''
+
+
+def render_page(source, jobs, structured_data=False, padding_kb=0):
+    """A whole result page; padding_kb adds boilerplate markup the size real pages carry"""
+    head = _embedded_data(source, jobs) if structured_data else ''
+    filler = ('<nav class="header"><ul>' + '<li><a href="/x">Link</a></li>' * 20 + '</ul></nav>'
+              '<div class="promo"><p>' + 'Lorem ipsum dolor sit amet. ' * 20 + '</p></div>')
+    boilerplate = filler * max(0, int(padding_kb * 1024 / len(filler)))
+    return (f'<html><head><title>{source}</title>{head}</head>'
+            f'<body>{boilerplate}<main>{_RENDERERS[source](jobs)}</main></body></html>')
+
+
+class FakeJobBoard:
+    """Serves search result pages shaped like the real boards, with injected latency and errors"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=200, jitter_ms=100,
+                 error_rate=0.0, error_status=503, jobs_per_page=15, structured_data=False, padding_kb=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.jobs_per_page = jobs_per_page
+        # Embed the listings as JSON too (parser's fast path), and pad pages to a realistic size
+        self.structured_data = structured_data
+        self.padding_kb = padding_kb
+        self.requests = 0
+        self.errors = 0
+        # Requests per exit the board saw them from (stand-in proxies add a Via header)
+        self.by_exit = {}
+        self._lock = threading.Lock()
+
+        board = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                board._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f'http://{host}:{self.server.server_address[1]}'
+        self._thread = None
+
+    def _page(self, path, params):
+        source, _, rest = path.lstrip('/').partition('/')
+        count = self.jobs_per_page
+        if source == 'indeed':
+            query, location = params.get('q', [''])[0], params.get('l', [''])[0]
+        elif source == 'linkedin':
+            query, location = params.get('keywords', [''])[0], params.get('location', [''])[0]
+        elif source == 'stepstone':
+            # /stepstone/jobs/<query>/in-<location>?page=N
+            parts = rest.split('/')
+            query = unquote(parts[1]) if len(parts) > 1 else ''
+            location = unquote(parts[2])[3:] if len(parts) > 2 else ''
+        elif source == 'eures':
+            query, location = params.get('query', [''])[0], params.get('location', [''])[0]
+            count = 10
+        else:
+            return None
+        jobs = _fake_jobs(f'{source}{path}{sorted(params.items())}', query, location, count)
+        return render_page(source, jobs, self.structured_data, self.padding_kb)
+
+    def _handle(self, handler):
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        failed = random.random() < self.error_rate
+        exit_name = handler.headers.get('Via', 'direct')
+        with self._lock:
+            self.requests += 1
+            self.errors += failed
+            self.by_exit[exit_name] = self.by_exit.get(exit_name, 0) + 1
+
+        url = urlsplit(handler.path)
+        page = None if failed else self._page(url.path, parse_qs(url.query))
+        if failed:
+            status, body = self.error_status, b'<html><body>Too many requests</body></html>'
+        elif page is None:
+            status, body = 404, b'<html><body>Not found</body></html>'
+        else:
+            status, body = 200, page.encode('utf-8')
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-board', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeProxy:
+    """Stand-in egress proxy: forwards plain-HTTP GET/HEAD requests; blocked=True answers 403 like a banned exit"""
+
+    def __init__(self, host='127.0.0.1', port=0, blocked=False):
+        self.blocked = blocked
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                proxy._handle(self)
+
+            def do_HEAD(self):
+                proxy._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_address[1]}'
+        self.name = self.url.split('://', 1)[1]
+        self._thread = None
+
+    def _handle(self, handler):
+        with self._lock:
+            self.requests += 1
+        if self.blocked:
+            status, headers, body = 403, {'Content-Type': 'text/html'}, b'<html><body>Access denied</body></html>'
+        else:
+            # Absolute-form request line: GET http://board/path HTTP/1.1
+            target = urlsplit(handler.path)
+            headers = {key: value for key, value in handler.headers.items()
+                       if key.lower() not in ('host', 'proxy-connection', 'connection')}
+            headers['Via'] = self.name
+            conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+            try:
+                path = target.path + (f'?{target.query}' if target.query else '')
+                conn.request(handler.command, path or '/', headers=headers)
+                response = conn.getresponse()
+                status, body = response.status, response.read()
+                headers = {key: value for key, value in response.getheaders()
+                           if key.lower() not in ('content-length', 'connection', 'transfer-encoding')}
+            finally:
+                conn.close()
+
+        handler.send_response(status)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if handler.command != 'HEAD':
+            handler.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-proxy', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------- App under test ----------
+
+def start_app(board_url, port, workdir, workers=1, sleep_scale=0.0, host_interval=0.0, search_cache_ttl=0.0,
+              egress_routes='direct'):
+    env = dict(os.environ)
+    env.update({
+        'JOB_BOARD_BASE_URL': board_url,
+        'PARSER_SLEEP_SCALE': str(sleep_scale),
+        'HOST_MIN_INTERVAL': str(host_interval),
+        'SEARCH_CACHE_TTL': str(search_cache_ttl),
+        'EGRESS_ROUTES': egress_routes,
+        'RETENTION_INTERVAL_HOURS': '0',
+    })
+    cmd = [sys.executable, '-m', 'uvicorn', 'main:app', '--app-dir', REPO_DIR,
+           '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+    if workers > 1:
+        cmd += ['--workers', str(workers)]
+    # Fresh working directory = fresh jobs.db / shared_state.db for every run
+    process = subprocess.Popen(cmd, cwd=workdir, env=env)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'App exited with code {process.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/jobs?limit=1')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('App did not start within 60s')
+
+
+# ---------- Load generator ----------
+
+def parse_mix(text):
+    # "search=1,jobs=6,statistics=3" -> {'search': 1.0, ...}
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operations: {', '.join(sorted(unknown))} (use {', '.join(OPERATIONS)})")
+    return mix
+
+
+def _search_request(rng):
+    body = {
+        'query': rng.choice(QUERIES),
+        'location': rng.choice(LOCATIONS),
+        'sources': rng.sample(SOURCES, rng.randint(1, len(SOURCES))),
+        'pages': 1,
+    }
+    return 'POST', '/api/search', json.dumps(body)
+
+
+OPERATIONS = {
+    'search': _search_request,
+    'jobs': lambda rng: ('GET', f'/api/jobs?limit=50&offset={rng.choice([0, 0, 0, 50, 100])}', None),
+    'statistics': lambda rng: ('GET', '/api/statistics', None),
+    'history': lambda rng: ('GET', '/api/search-history', None),
+}
+
+
+class LoadGenerator:
+
+    def __init__(self, host, port, rate, duration, mix, concurrency=64, timeout=300, seed=None):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.results = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _send(self, name, method, path, body, scheduled):
+        status = None
+        try:
+            conn = self._connection()
+            headers = {'Content-Type': 'application/json'} if body else {}
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self._local.conn = None
+        # Measured from the scheduled send time, so a saturated server shows up as
+        # latency instead of silently lowering the request rate
+        latency = time.perf_counter() - scheduled
+        with self._lock:
+            self.results.append((name, status, latency))
+
+    def run(self):
+        names = list(self.mix)
+        weights = [self.mix[n] for n in names]
+        total = int(self.rate * self.duration)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for i in range(total):
+                scheduled = started + i / self.rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name = self.rng.choices(names, weights)[0]
+                method, path, body = OPERATIONS[name](self.rng)
+                pool.submit(self._send, name, method, path, body, scheduled)
+        elapsed = time.perf_counter() - started
+        return self.results, elapsed
+
+
+# ---------- Report ----------
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(results, elapsed):
+    def stats(rows):
+        latencies = sorted(latency * 1000 for _, _, latency in rows)
+        errors = sum(1 for _, status, _ in rows if status is None or status >= 400)
+        return {
+            'requests': len(rows),
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'throughput_rps': round((len(rows) - errors) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        }
+
+    endpoints = {}
+    for name in sorted({r[0] for r in results}):
+        endpoints[name] = stats([r for r in results if r[0] == name])
+    return {'elapsed_seconds': round(elapsed, 2), 'endpoints': endpoints, 'total': stats(results)}
+
+
+def compare(report, baseline, tolerance=0.2, min_delta_ms=5.0):
+    """Regressions of report against baseline; empty list = no regression"""
+    regressions = []
+    for name, current in report['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(name)
+        if not base:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            # Small absolute changes on fast endpoints are noise, not regressions
+            if current[key] > base[key] * (1 + tolerance) and current[key] - base[key] > min_delta_ms:
+                regressions.append(f'{name} {key}: {base[key]} -> {current[key]} '
+                                   f'(+{(current[key] / base[key] - 1) * 100 if base[key] else 100:.0f}%)')
+        if current['error_rate'] > base['error_rate'] + 0.01:
+            regressions.append(f"{name} error_rate: {base['error_rate']} -> {current['error_rate']}")
+        if current['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name} throughput_rps: {base['throughput_rps']} -> {current['throughput_rps']}")
+    return regressions
+
+
+def print_report(report):
+    header = f"{'endpoint':<12}{'reqs':>7}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print('-' * len(header))
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+    for name, s in rows:
+        print(f"{name:<12}{s['requests']:>7}{s['errors']:>8}{s['throughput_rps']:>9}"
+              f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    board = report.get('board')
+    if board:
+        print(f"\nStand-in board: {board['requests']} page requests, {board['errors']} injected errors")
+        if len(board.get('by_exit', {})) > 1:
+            print('  by exit: ' + ', '.join(f'{name} {count}' for name, count in sorted(board['by_exit'].items())))
+    for name, proxy in report.get('proxies', {}).items():
+        print(f"Stand-in proxy {name}: {proxy['requests']} requests{' (answers 403)' if proxy['blocked'] else ''}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Load test the Job Parser API against a stand-in job board')
+    arg_parser.add_argument('--rate', type=float, default=10, help='Requests per second to send')
+    arg_parser.add_argument('--duration', type=float, default=30, help='Seconds to send requests for')
+    arg_parser.add_argument('--mix', default='search=1,jobs=6,statistics=3',
+                            help=f"Weighted request mix, operations: {', '.join(OPERATIONS)}")
+    arg_parser.add_argument('--concurrency', type=int, default=64, help='Max requests in flight')
+    arg_parser.add_argument('--seed-searches', type=int, default=20,
+                            help='Searches run before measuring, so the jobs table is not empty')
+    arg_parser.add_argument('--target', help='Test an already running server (host:port) instead of starting one')
+    arg_parser.add_argument('--port', type=int, default=8765, help='Port for the app started by the load test')
+    arg_parser.add_argument('--workers', type=int, default=1, help='uvicorn workers for the app under test')
+    arg_parser.add_argument('--board-latency-ms', type=float, default=200, help='Stand-in board response time')
+    arg_parser.add_argument('--board-jitter-ms', type=float, default=100, help='+/- random latency')
+    arg_parser.add_argument('--board-error-rate', type=float, default=0.0, help='Share of board pages that fail')
+    arg_parser.add_argument('--board-error-status', type=int, default=503, help='HTTP status of failed pages')
+    arg_parser.add_argument('--board-structured-data', action='store_true',
+                            help='Embed listings as JSON-LD/hydration state (the parser fast path)')
+    arg_parser.add_argument('--board-padding-kb', type=float, default=0, help='Boilerplate markup per page')
+    arg_parser.add_argument('--proxies', type=int, default=0,
+                            help='Stand-in egress proxies to crawl through (EGRESS_ROUTES for the app)')
+    arg_parser.add_argument('--blocked-proxies', type=int, default=0,
+                            help='How many of those proxies answer 403, like exits the board has banned')
+    arg_parser.add_argument('--sleep-scale', type=float, default=0.0,
+                            help='Parser politeness sleep multiplier (1 = production delays)')
+    arg_parser.add_argument('--host-interval', type=float, default=0.0, help='HOST_MIN_INTERVAL for the app')
+    arg_parser.add_argument('--search-cache-ttl', type=float, default=0.0, help='SEARCH_CACHE_TTL for the app')
+    arg_parser.add_argument('--random-seed', type=int, default=42, help='Seed for the request mix')
+    arg_parser.add_argument('--out', help='Write the report as JSON')
+    arg_parser.add_argument('--save-baseline', help='Write the report as the new baseline')
+    arg_parser.add_argument('--baseline', help='Compare against a saved baseline; exit 1 on regression')
+    arg_parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown vs baseline')
+    args = arg_parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    board = None
+    proxies = []
+    app = None
+    workdir = None
+    try:
+        if args.target:
+            host, _, port = args.target.rpartition(':')
+            host, port = host or '127.0.0.1', int(port)
+        else:
+            board = FakeJobBoard(latency_ms=args.board_latency_ms, jitter_ms=args.board_jitter_ms,
+                                 error_rate=args.board_error_rate, error_status=args.board_error_status,
+                                 structured_data=args.board_structured_data,
+                                 padding_kb=args.board_padding_kb).start()
+            proxies = [FakeProxy(blocked=n < args.blocked_proxies).start() for n in range(args.proxies)]
+            routes = ','.join(proxy.url for proxy in proxies) or 'direct'
+            workdir = tempfile.mkdtemp(prefix='loadtest-')
+            host, port = '127.0.0.1', args.port
+            print(f'Stand-in board on {board.base_url}, app on {host}:{port} (data in {workdir})')
+            if proxies:
+                print(f'Egress through {len(proxies)} stand-in proxies ({args.blocked_proxies} blocked)')
+            app = start_app(board.base_url, port, workdir, workers=args.workers, sleep_scale=args.sleep_scale,
+                            host_interval=args.host_interval, search_cache_ttl=args.search_cache_ttl,
+                            egress_routes=routes)
+
+        if args.seed_searches:
+            print(f'Seeding with {args.seed_searches} searches...')
+            LoadGenerator(host, port, rate=args.seed_searches, duration=1, mix={'search': 1},
+                          concurrency=8, seed=args.random_seed + 1).run()
+
+        print(f'Sending {args.rate:g} req/s for {args.duration:g}s, mix {args.mix}...')
+        results, elapsed = LoadGenerator(host, port, args.rate, args.duration, mix,
+                                         concurrency=args.concurrency, seed=args.random_seed).run()
+        report = summarize(results, elapsed)
+        report['config'] = {key: value for key, value in vars(args).items()
+                            if key not in ('out', 'save_baseline', 'baseline')}
+        if board:
+            report['board'] = {'requests': board.requests, 'errors': board.errors, 'by_exit': board.by_exit}
+        if proxies:
+            report['proxies'] = {proxy.name: {'requests': proxy.requests, 'blocked': proxy.blocked}
+                                 for proxy in proxies}
+    finally:
+        if app is not None:
+            app.terminate()
+            app.wait(timeout=30)
+        if board is not None:
+            board.stop()
+        for proxy in proxies:
+            proxy.stop()
+
+    print()
+    print_report(report)
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f'Report written to {path}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, tolerance=args.tolerance)
+        if regressions:
+            print(f'\n❌ {len(regressions)} regression(s) vs {args.baseline}:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'\n✅ No regressions vs {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# ==================== lookups.py ====================
+# Dictionary encoding for the repetitive job columns
+# company/location/source names are stored once and referenced by integer id
+
+import re
+import threading
+
+from metrics import CACHE_REQUESTS
+
+
+LOOKUP_TABLES = ('companies', 'locations', 'sources')
+
+# Spelling variants seen on the job boards -> one canonical name
+_CITY_ALIASES = {
+    'munich': 'München',
+    'muenchen': 'München',
+    'munchen': 'München',
+    'cologne': 'Köln',
+    'koeln': 'Köln',
+    'koln': 'Köln',
+    'nuremberg': 'Nürnberg',
+    'nuernberg': 'Nürnberg',
+    'nurnberg': 'Nürnberg',
+    'duesseldorf': 'Düsseldorf',
+    'dusseldorf': 'Düsseldorf',
+    'hanover': 'Hannover',
+    'frankfurt': 'Frankfurt am Main',
+    'frankfurt a.m.': 'Frankfurt am Main',
+    'frankfurt a. m.': 'Frankfurt am Main',
+    'frankfurt/main': 'Frankfurt am Main',
+    'frankfurt (main)': 'Frankfurt am Main',
+    'vienna': 'Wien',
+    'zurich': 'Zürich',
+}
+
+_COUNTRY_SUFFIX = re.compile(r',\s*(deutschland|germany|de|österreich|austria|schweiz|switzerland)$', re.IGNORECASE)
+_POSTAL_CODE = re.compile(r'^\d{4,5}\s+|\s+\d{4,5}$')
+
+
+def normalize_location(location):
+    if not location:
+        return location
+
+    text = ' '.join(location.split())
+    text = _COUNTRY_SUFFIX.sub('', text)
+    text = _POSTAL_CODE.sub('', text).strip()
+    return _CITY_ALIASES.get(text.lower(), text)
+
+
+class LookupCache:
+    # name -> id per lookup table; ids are never reused, so the cache only
+    # has to be dropped when a transaction that created new names rolls back
+
+    def __init__(self):
+        self._ids = {table: {} for table in LOOKUP_TABLES}
+        self._lock = threading.Lock()
+
+    def get_id(self, cursor, table, name):
+        if name is None:
+            return None
+
+        cached = self._ids[table].get(name)
+        if cached is not None:
+            CACHE_REQUESTS.inc(cache='lookups', result='hit')
+            return cached
+        CACHE_REQUESTS.inc(cache='lookups', result='miss')
+
+        cursor.execute(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', (name,))
+        row = cursor.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()
+        with self._lock:
+            self._ids[table][name] = row[0]
+        return row[0]
+
+    def reset(self):
+        with self._lock:
+            self._ids = {table: {} for table in LOOKUP_TABLES}
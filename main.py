@@ -1,13 +1,31 @@
+# Taken before the heavy imports so the import time can be reported on /metrics
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, Request, HTTPException, Body
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
-import uvicorn
-from database import JobDatabase
-from parser import InternationalJobParser
-from site_tester import SiteTester
+import asyncio
+import json
+import os
+import threading
+from database import JobDatabase, encode_cursor, decode_cursor
+from async_database import AsyncJobDatabase
+from retention import RetentionManager
+from ingest import IngestQueue, IngestQueueFull
+from dedup import collapse_jobs
+from export import export_jobs, MEDIA_TYPES
+from job_record import json_default
+from responses import FastJSONResponse, CompressionMiddleware, conditional_json, select_fields
+from static_assets import StaticAsset
+from metrics import REGISTRY, INGEST_QUEUE_DEPTH, CACHE_REQUESTS, STARTUP_SECONDS, RequestMetricsMiddleware
+from tracing import requested_mode, start_trace, span
+from shared_state import SharedState, search_key
+from batch_search import BatchCrawler
 import logging
 
 
@@ -16,7 +34,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
-app = FastAPI(title="Job Parser API")
+app = FastAPI(title="Job Parser API", default_response_class=FastJSONResponse)
 
 # Add CORS middleware to allow requests from any domain
 app.add_middleware(
@@ -27,10 +45,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for JSON, NDJSON and text responses
+app.add_middleware(CompressionMiddleware)
+
+# Per-route request latency for /metrics
+app.add_middleware(RequestMetricsMiddleware, started_at=_import_started)
+
+# LAZY_STARTUP=0 restores the old behaviour: schema work and parser imports before serving
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "1") != "0"
+
+
+class LazyInstance:
+    """Builds the wrapped object, heavy imports included, on first attribute access"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def built(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def _make_parser():
+    # requests, bs4 and urllib3 are only imported once a search needs them
+    from parser import InternationalJobParser
+    from prefetch import PagePrefetcher
+    instance = InternationalJobParser(shared_state=shared)
+    # Next pages fetched ahead on spare budget are served to this parser's page loops
+    instance.page_cache = PagePrefetcher(instance, shared)
+    return instance
+
+
+def _make_tester():
+    from site_tester import SiteTester
+    # Same egress routes and route health as the crawls
+    return SiteTester(egress=parser.get().egress)
+
+
 # Initialize database, parser and site tester
-db = JobDatabase()
-parser = InternationalJobParser()
-tester = SiteTester()
+db = JobDatabase(defer_init=LAZY_STARTUP)
+adb = AsyncJobDatabase(db)
+# Coordinates rate limits, identical searches and the retention schedule across worker processes
+shared = SharedState(defer_init=LAZY_STARTUP)
+retention = RetentionManager(db, shared_state=shared)
+ingest = IngestQueue(db)
+parser = LazyInstance(_make_parser)
+# Batch searches share one per-host schedule, so a batch is one polite crawl rather than N
+crawler = LazyInstance(lambda: BatchCrawler(parser.get()))
+tester = LazyInstance(_make_tester)
+index_page = StaticAsset(os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.html"))
+
+INGEST_QUEUE_DEPTH.set_function(lambda: ingest.stats()['queue_depth'])
+
+
+async def cancel_on_disconnect(request: Request, awaitable, poll_interval=0.25):
+    """Await a DB call, cancelling it if the client disconnects first"""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.info(f"Client disconnected, cancelled {request.url.path}")
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
 
 
 # Define data models for requests/responses
@@ -42,6 +136,36 @@ class SearchRequest(BaseModel):
     pages: int = 2
     page: int = 0
     sources: List[str]
+    collapse_duplicates: bool = False
+    fields: Optional[List[str]] = None
+
+
+class BatchSearchItem(BaseModel):
+    query: str
+    location: str
+    sources: List[str] = []
+    page: int = 0
+    pages: int = 1
+
+
+class BatchSearchRequest(BaseModel):
+    searches: List[BatchSearchItem]
+    salary: Optional[str] = None
+    experience: str = "all"
+    collapse_duplicates: bool = False
+    fields: Optional[List[str]] = None
+
+
+BATCH_MAX_SEARCHES = int(os.getenv("BATCH_MAX_SEARCHES", 50))
+
+
+class SavedSearchRequest(BaseModel):
+    query: str
+    location: str = ""
+    sources: List[str] = []
+    salary: Optional[str] = None
+    experience: str = "all"
+    name: Optional[str] = None
 
 
 class JobResponse(BaseModel):
@@ -59,13 +183,12 @@ class JobResponse(BaseModel):
 # API Endpoints
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Serve home page"""
     try:
-        with open("index.html", "r", encoding="utf-8") as f:
-            return f.read()
+        return index_page.response(request)
     except FileNotFoundError:
-        return "<h1>File index.html not found</h1>"
+        return HTMLResponse("<h1>File index.html not found</h1>")
 
 
 @app.get("/test")
@@ -80,130 +203,482 @@ async def options_handler(path: str):
     return JSONResponse({"message": "OK"})
 
 
-@app.post("/api/search")
-async def search_jobs(request: SearchRequest):
-    """Search for jobs without AI"""
-    try:
-        logger.info(f"Search request: {request.query} in {request.location}")
-        
-        # Map old sources to new ones
-        source_mapping = {
-            'indeed': 'indeed',
-            'stepstone': 'stepstone',
-            'xing': 'linkedin',
-            'remotive': 'indeed',
-            'olx': 'stepstone',
-            'linkedin': 'linkedin',
-            'glassdoor': 'indeed',
-            'stackoverflow': 'eures',
-            'github': 'stepstone'
+# Map old sources to new ones
+SOURCE_MAPPING = {
+    'indeed': 'indeed',
+    'stepstone': 'stepstone',
+    'xing': 'linkedin',
+    'remotive': 'indeed',
+    'olx': 'stepstone',
+    'linkedin': 'linkedin',
+    'glassdoor': 'indeed',
+    'stackoverflow': 'eures',
+    'github': 'stepstone'
+}
+
+
+def resolve_sources(requested):
+    # Convert sources using mapping and remove duplicates
+    sources = list(set(SOURCE_MAPPING.get(s, s) for s in requested))
+    
+    # Use default sources if none provided
+    return sources or ['indeed', 'linkedin', 'stepstone']
+
+
+async def run_search(request: SearchRequest):
+    logger.info(f"Search request: {request.query} in {request.location}")
+    
+    sources = resolve_sources(request.sources)
+    
+    logger.info(f"📊 Testing sites...")
+    site_tests = {}
+    for source in sources:
+        site_tests[source] = {
+            'available': True,
+            'status': 'checking'
         }
-        
-        # Convert sources using mapping
-        sources = [source_mapping.get(s, s) for s in request.sources]
-        # Remove duplicates
-        sources = list(set(sources))
-        
-        # Use default sources if none provided
-        if not sources:
-            sources = ['indeed', 'linkedin', 'stepstone']
-        
-        logger.info(f"📊 Testing sites...")
-        site_tests = {}
-        for source in sources:
-            site_tests[source] = {
-                'available': True,
-                'status': 'checking'
-            }
-        
-        # Parse jobs - just simple parsing without AI
-        logger.info(f"🔍 Parsing {sources}...")
-        jobs = parser.parse_all_sites(
+    
+    # Parse jobs - just simple parsing without AI
+    # Identical searches running in any worker share one scrape; recent results are reused
+    logger.info(f"🔍 Parsing {sources}...")
+    jobs, outcome = await run_in_threadpool(
+        shared.single_flight,
+        search_key(request.query, request.location, sources, request.page, request.pages),
+        lambda: parser.parse_all_sites(
             query=request.query,
             location=request.location,
             sources=sources,
             page=request.page,
             max_pages=request.pages
         )
-        
-        logger.info(f"Found {len(jobs)} vacancies")
-        
-        # Filter jobs based on criteria
-        filtered_jobs = InternationalJobParser.filter_jobs(
+    )
+    CACHE_REQUESTS.inc(cache='search', result='miss' if outcome == 'computed' else 'hit')
+    if outcome != 'computed':
+        logger.info(f"♻️ Reused {outcome} results for this search")
+    elif parser.page_cache is not None:
+        # Page N+1 is usually the next request; fetch it ahead while the boards have spare budget
+        parser.page_cache.schedule(sources, request.query, request.location, request.page + request.pages)
+    
+    logger.info(f"Found {len(jobs)} vacancies")
+    
+    # Filter jobs based on criteria
+    filtered_jobs = parser.filter_jobs(
+        jobs,
+        min_salary=int(request.salary) if request.salary else None,
+        experience_level=request.experience
+    )
+    
+    # Queue jobs and search history for the batching writer
+    saved_future = await run_in_threadpool(ingest.enqueue_jobs, filtered_jobs)
+    await run_in_threadpool(
+        ingest.enqueue_search_history,
+        query=request.query,
+        location=request.location,
+        sources=request.sources,
+        results_count=len(filtered_jobs)
+    )
+    with span('ingest.wait'):
+        saved_count = await asyncio.wrap_future(saved_future)
+    
+    # Same posting found on several boards -> show it once
+    with span('collapse_jobs'):
+        response_jobs = collapse_jobs(filtered_jobs) if request.collapse_duplicates else filtered_jobs
+    
+    # Prepare statistics
+    stats = {
+        'total': len(filtered_jobs),
+        'unique': len(response_jobs),
+        'saved': saved_count,
+        'indeed': len([j for j in filtered_jobs if j['source'] == 'Indeed']),
+        'stepstone': len([j for j in filtered_jobs if j['source'] == 'StepStone']),
+        'xing': len([j for j in filtered_jobs if j['source'] == 'LinkedIn']),
+        'site_tests': site_tests
+    }
+    
+    return {"jobs": select_fields(response_jobs, request.fields), "stats": stats}
+
+
+@app.post("/api/search")
+async def search_jobs(request: SearchRequest, http_request: Request, trace: Optional[str] = None):
+    """Search for jobs without AI
+
+    With TRACING_ENABLED=1, `X-Trace: 1` (or `?trace=1`) makes the response carry the
+    span tree of the request; with TRACE_PROFILE_ENABLED=1 as well, `profile` instead
+    of `1` also writes a sampling profile to disk.
+    """
+    try:
+        mode = requested_mode(trace or http_request.headers.get("x-trace"))
+        if mode is None:
+            return FastJSONResponse(await run_search(request))
+
+        with start_trace("search_jobs", profile=(mode == "profile"),
+                         query=request.query, location=request.location) as active:
+            content = await run_search(request)
+        content["trace"] = active.to_dict()
+        return FastJSONResponse(content, headers={"X-Trace-Id": active.id})
+    except IngestQueueFull as e:
+        logger.warning(f"Ingest backpressure: {e}")
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except Exception as e:
+        logger.error(f"Error: {e}", exc_info=True)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.post("/api/search/batch")
+async def search_jobs_batch(request: BatchSearchRequest, http_request: Request):
+    """Run many query/location searches as one crawl, streamed as NDJSON
+
+    Each search gets one line as soon as all of its pages are in; pages shared by
+    several searches are fetched once. The last line is the crawl summary.
+    """
+    if not request.searches:
+        raise HTTPException(status_code=400, detail="No searches given")
+    if len(request.searches) > BATCH_MAX_SEARCHES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_SEARCHES} searches per batch")
+
+    searches = [{
+        'query': item.query,
+        'location': item.location,
+        'sources': resolve_sources(item.sources),
+        'page': item.page,
+        'pages': item.pages,
+    } for item in request.searches]
+    logger.info(f"🧺 Batch search: {len(searches)} searches")
+
+    loop = asyncio.get_running_loop()
+    results = asyncio.Queue()
+    cancel_event = threading.Event()
+
+    def on_result(index, jobs, info):
+        # Called from the crawler's host threads
+        loop.call_soon_threadsafe(results.put_nowait, (index, jobs, info))
+
+    async def crawl():
+        try:
+            summary = await run_in_threadpool(crawler.run, searches, on_result, cancel_event)
+        except Exception as e:
+            logger.error(f"Batch error: {e}", exc_info=True)
+            summary = {'error': str(e)}
+        await results.put(None)
+        return summary
+
+    async def result_line(index, jobs, info):
+        item = request.searches[index]
+        filtered_jobs = parser.filter_jobs(
             jobs,
             min_salary=int(request.salary) if request.salary else None,
             experience_level=request.experience
         )
-        
-        # Save jobs to database
-        saved_count = db.save_jobs(filtered_jobs)
-        
-        # Save search history
-        db.save_search_history(
-            query=request.query,
-            location=request.location,
-            sources=request.sources,
-            results_count=len(filtered_jobs)
-        )
-        
-        # Prepare statistics
-        stats = {
-            'total': len(filtered_jobs),
-            'saved': saved_count,
-            'indeed': len([j for j in filtered_jobs if j['source'] == 'Indeed']),
-            'stepstone': len([j for j in filtered_jobs if j['source'] == 'StepStone']),
-            'xing': len([j for j in filtered_jobs if j['source'] == 'LinkedIn']),
-            'site_tests': site_tests
+        response_jobs = collapse_jobs(filtered_jobs) if request.collapse_duplicates else filtered_jobs
+        stats = {'total': len(filtered_jobs), 'unique': len(response_jobs), 'saved': 0}
+        try:
+            saved_future = await run_in_threadpool(ingest.enqueue_jobs, filtered_jobs)
+            await run_in_threadpool(
+                ingest.enqueue_search_history,
+                query=item.query,
+                location=item.location,
+                sources=item.sources,
+                results_count=len(filtered_jobs)
+            )
+            stats['saved'] = await asyncio.wrap_future(saved_future)
+        except IngestQueueFull as e:
+            logger.warning(f"Ingest backpressure: {e}")
+            info = {**info, 'ingest_error': str(e)}
+        line = {
+            'index': index,
+            'query': item.query,
+            'location': item.location,
+            'jobs': select_fields(response_jobs, request.fields),
+            'stats': stats,
+            'info': info,
         }
-        
-        return {"jobs": filtered_jobs, "stats": stats}
-    except Exception as e:
-        logger.error(f"Error: {e}", exc_info=True)
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return (json.dumps(line, ensure_ascii=False, default=json_default) + '\n').encode('utf-8')
+
+    async def stream():
+        task = asyncio.ensure_future(crawl())
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                yield await result_line(*result)
+            yield (json.dumps({'done': True, **(await task)}) + '\n').encode('utf-8')
+        finally:
+            # Client went away: stop the host workers at their next page or delay
+            cancel_event.set()
+
+    return StreamingResponse(stream(), media_type=MEDIA_TYPES['ndjson'])
 
 
 @app.get("/api/jobs")
-async def get_jobs(limit: int = 50, offset: int = 0):
+async def get_jobs(request: Request, limit: int = 50, offset: int = 0, collapse: bool = False,
+                   fields: Optional[str] = None):
     """Get jobs from database"""
     try:
-        jobs = db.get_all_jobs(limit=limit, offset=offset)
-        return jobs
+        async def build():
+            jobs = await cancel_on_disconnect(request, adb.get_all_jobs(limit=limit, offset=offset, collapse=collapse))
+            return select_fields(jobs, fields)
+        
+        return await conditional_json(request, await adb.get_data_version('jobs'), build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/export")
+async def export(format: str = "ndjson", source: str = "", since: Optional[str] = None,
+                 until: Optional[str] = None):
+    """Stream the jobs table as NDJSON, CSV or Parquet"""
+    try:
+        chunks = export_jobs(db, format, source=source, since=since, until=until)
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="jobs.{format}"'}
+    )
+
+
 @app.get("/api/statistics")
-async def get_statistics():
+async def get_statistics(request: Request):
     """Get statistics about jobs"""
     try:
-        stats = db.get_statistics()
-        return stats
+        async def build():
+            return await cancel_on_disconnect(request, adb.get_statistics())
+        
+        return await conditional_json(request, await adb.get_data_version('jobs'), build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/search-history")
-async def get_search_history():
+async def get_search_history(request: Request):
     """Get search history""" 
     try:
-        history = db.get_search_history()
-        return history
+        async def build():
+            return await cancel_on_disconnect(request, adb.get_search_history())
+        
+        return await conditional_json(request, await adb.get_data_version('search_history'), build)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/search-history/top")
+async def get_top_queries(request: Request, limit: int = 10, days: Optional[int] = None):
+    """Get the most searched queries, all-time or over the last N days"""
+    try:
+        async def build():
+            return await cancel_on_disconnect(request, adb.get_top_queries(limit=limit, days=days))
+        
+        return await conditional_json(request, await adb.get_data_version('search_history'), build)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def saved_search_delta(search, cursor=None, limit=100):
+    # New jobs for a saved search since `cursor` (default: its server-side watermark)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    source_names = [parser.SOURCE_NAMES[s] for s in search['sources'] if s in parser.SOURCE_NAMES]
+    jobs, position, has_more = await adb.get_new_jobs(
+        search, after=after, limit=max(1, min(limit, 500)), source_names=source_names)
+    
+    # Stored rows carry no is_recent flag; first seen since the cursor is recent enough
+    jobs = parser.filter_jobs(
+        jobs,
+        min_salary=int(search['salary']) if search['salary'] else None,
+        experience_level=search['experience'],
+        only_recent=False
+    )
+    return {"saved_search_id": search['id'], "jobs": jobs, "cursor": encode_cursor(position), "has_more": has_more}
+
+
+async def load_saved_search(search_id):
+    search = await adb.get_saved_search(search_id)
+    if search is None:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return search
+
+
+@app.post("/api/saved-searches")
+async def create_saved_search(request: SavedSearchRequest):
+    """Save a search; its delta feed starts with jobs first seen after this call"""
+    try:
+        return await adb.create_saved_search(
+            request.query,
+            location=request.location,
+            sources=resolve_sources(request.sources),
+            salary=request.salary,
+            experience=request.experience,
+            name=request.name
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/saved-searches")
+async def list_saved_searches():
+    """List saved searches with their watermarks"""
+    try:
+        return await adb.list_saved_searches()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/saved-searches/{search_id}")
+async def get_saved_search(search_id: int):
+    return await load_saved_search(search_id)
+
+
+@app.delete("/api/saved-searches/{search_id}")
+async def delete_saved_search(search_id: int):
+    if not await adb.delete_saved_search(search_id):
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return {"deleted": search_id}
+
+
+@app.get("/api/saved-searches/{search_id}/new")
+async def get_saved_search_delta(search_id: int, cursor: Optional[str] = None, limit: int = 100):
+    """Jobs first seen since `cursor` (or since the last poll), oldest first
+
+    Reads the jobs table only, never crawls. Pass the returned `cursor` to the
+    next call; `has_more` means another page is ready right away.
+    """
+    try:
+        return await saved_search_delta(await load_saved_search(search_id), cursor, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/saved-searches/{search_id}/run")
+async def run_saved_search(search_id: int, cursor: Optional[str] = None, limit: int = 100):
+    """Crawl the saved search now, then return what is new since `cursor` or the last poll"""
+    search = await load_saved_search(search_id)
+    try:
+        result = await run_search(SearchRequest(
+            query=search['query'],
+            location=search['location'] or "",
+            sources=search['sources'],
+            salary=search['salary'],
+            experience=search['experience'] or "all"
+        ))
+        delta = await saved_search_delta(search, cursor, limit)
+        delta["stats"] = result["stats"]
+        return delta
+    except HTTPException:
+        raise
+    except IngestQueueFull as e:
+        logger.warning(f"Ingest backpressure: {e}")
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except Exception as e:
+        logger.error(f"Error: {e}", exc_info=True)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
 @app.delete("/api/jobs/old")
 async def delete_old_jobs(days: int = 30):
     """Delete old jobs"""
     try:
-        deleted = db.clear_old_jobs(days=days)
-        return {"deleted": deleted}
+        report = await run_in_threadpool(retention.purge, days)
+        return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/retention")
+async def get_retention():
+    """Get retention settings and last purge report"""
+    return {
+        "days": retention.days,
+        "interval_hours": retention.interval_hours,
+        "freelist_remaining": retention.freelist_remaining,
+        "last_report": retention.last_report
+    }
+
+
+@app.get("/api/ingest/stats")
+async def get_ingest_stats():
+    """Get write queue depth and commit latency"""
+    return ingest.stats()
+
+
+@app.get("/api/egress")
+async def get_egress():
+    """Get egress routes with their health and request counts"""
+    return parser.egress.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: fetch/parse latency, selector hit rates, DB commits, caches"""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def warm_up():
+    # Everything the first requests would otherwise pay for
+    started = time.perf_counter()
+    try:
+        index_page.load()
+    except FileNotFoundError:
+        logger.warning("index.html not found")
+    try:
+        db.ensure_initialized()
+        shared.ensure_initialized()
+        parser.get()
+        retention.start()
+    except Exception as e:
+        logger.error(f"❌ Warm-up error: {e}", exc_info=True)
+    STARTUP_SECONDS.set(time.perf_counter() - started, phase="warm_up")
+    logger.info(f"🔥 Warm-up done in {time.perf_counter() - started:.3f}s")
+
+
+@app.on_event("startup")
+async def startup():
+    started = time.perf_counter()
+    if LAZY_STARTUP:
+        # Start serving now; requests that need the DB wait for its schema only if they beat the warm-up
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        await run_in_threadpool(warm_up)
+    STARTUP_SECONDS.set(time.perf_counter() - started, phase="startup")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    retention.stop()
+    if parser.built and parser.page_cache is not None:
+        await run_in_threadpool(parser.page_cache.close)
+    await run_in_threadpool(ingest.close)
+    await run_in_threadpool(adb.close)
+
+
+STARTUP_SECONDS.set(time.perf_counter() - _import_started, phase="import")
+logger.info(f"📦 App imported in {time.perf_counter() - _import_started:.3f}s")
+
+
 if __name__ == "__main__":
+    import uvicorn
+
     logger.info("🚀 Starting FastAPI server...")
     logger.info("📱 Open browser: http://localhost:8000")
     logger.info("📚 API documentation: http://localhost:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Several workers share rate limits and searches through shared_state.db
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
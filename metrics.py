@@ -0,0 +1,234 @@
+# ==================== metrics.py ====================
+# Minimal Prometheus-style metrics (counters, gauges, histograms)
+# Rendered in the text exposition format on /metrics
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}' for key, v in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+        self._function = None
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        # Value is read when metrics are scraped
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                return [f'{self.name} {_format_value(self._function())}']
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}' for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labels, registry)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, ([*s[0]], s[1], s[2])) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        return '\n'.join(m.render() for m in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+# ---------- Application metrics ----------
+
+FETCH_SECONDS = Histogram(
+    'job_parser_fetch_seconds', 'HTTP fetch latency per host and status code', ['host', 'status'])
+PARSE_SECONDS = Histogram(
+    'job_parser_parse_seconds', 'BeautifulSoup parse time per page', ['source'])
+CARDS_EXTRACTED = Counter(
+    'job_parser_cards_extracted_total', 'Job cards turned into jobs, by selector that found them',
+    ['source', 'selector'])
+CARDS_DROPPED = Counter(
+    'job_parser_cards_dropped_total', 'Job cards found but not turned into jobs', ['source', 'selector', 'reason'])
+SLEEP_SECONDS = Counter(
+    'job_parser_politeness_sleep_seconds_total', 'Time spent in politeness sleeps', ['source'])
+RATE_LIMIT_WAIT_SECONDS = Counter(
+    'job_parser_rate_limit_wait_seconds_total', 'Time spent waiting for a shared per-host request slot', ['host'])
+DB_COMMIT_SECONDS = Histogram(
+    'job_parser_db_commit_seconds', 'Database write transaction latency', ['operation'])
+CACHE_REQUESTS = Counter(
+    'job_parser_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ['cache', 'result'])
+INGEST_QUEUE_DEPTH = Gauge(
+    'job_parser_ingest_queue_depth', 'Items waiting in the ingest queue')
+API_REQUEST_SECONDS = Histogram(
+    'job_parser_api_request_seconds', 'API request latency', ['method', 'path', 'status'])
+PREFETCH_PAGES = Counter(
+    'job_parser_prefetch_pages_total',
+    'Speculative next-page fetches by outcome (fetched, failed, skipped_busy, skipped_budget, used, expired)',
+    ['source', 'outcome'])
+EGRESS_REQUESTS = Counter(
+    'job_parser_egress_requests_total', 'Board requests per egress route by outcome (ok, blocked, error)',
+    ['route', 'outcome'])
+EGRESS_ROUTE_HEALTHY = Gauge(
+    'job_parser_egress_route_healthy', '1 if the egress route is in rotation, 0 while it cools down', ['route'])
+STARTUP_SECONDS = Gauge(
+    'job_parser_startup_seconds', 'Cold start timings: import, startup hook, first request, time to first response',
+    ['phase'])
+
+
+class RequestMetricsMiddleware:
+    """Records API_REQUEST_SECONDS for every HTTP request, and the cold start's first one"""
+
+    def __init__(self, app, started_at=None):
+        self.app = app
+        # perf_counter() when the app began importing; the first response is timed from there
+        self.started_at = started_at
+        self._first_seen = False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Route template ("/api/jobs") rather than the raw path keeps label cardinality bounded
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            finished = time.perf_counter()
+            API_REQUEST_SECONDS.observe(finished - started, method=scope['method'], path=path, status=status)
+            if not self._first_seen:
+                self._first_seen = True
+                STARTUP_SECONDS.set(finished - started, phase='first_request')
+                if self.started_at is not None:
+                    STARTUP_SECONDS.set(finished - self.started_at, phase='time_to_first_response')
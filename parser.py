@@ -1,6 +1,5 @@
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
 import time
 from concurrent.futures import ThreadPoolExecutor
 import re
@@ -8,8 +7,16 @@ import random
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import logging
-from urllib.parse import urljoin, quote
+from urllib.parse import urljoin, quote, urlparse
 import json
+import os
+
+from metrics import (FETCH_SECONDS, PARSE_SECONDS, CARDS_EXTRACTED, CARDS_DROPPED, SLEEP_SECONDS,
+                     RATE_LIMIT_WAIT_SECONDS)
+from tracing import span, traced, bind
+from job_record import JobPage, JobRecord
+from structured_data import extract_listings
+from egress import EgressPool
 
 
 # Set up logging
@@ -22,8 +29,44 @@ logger = logging.getLogger(__name__)
 
 class InternationalJobParser:
     # Class for parsing jobs from different websites
+
+    SOURCE_NAMES = {
+        'indeed': 'Indeed',
+        'linkedin': 'LinkedIn',
+        'stepstone': 'StepStone',
+        'eures': 'EURES',
+    }
+    # EURES only ever serves its first result page
+    PAGED_SOURCES = ('indeed', 'linkedin', 'stepstone')
+
+    BASE_URLS = {
+        'indeed': 'https://de.indeed.com',
+        'linkedin': 'https://www.linkedin.com',
+        'stepstone': 'https://www.stepstone.de',
+        'eures': 'https://eures.europa.eu',
+    }
     
-    def __init__(self):
+    def __init__(self, shared_state=None, host_interval=None, base_url=None, sleep_scale=None, page_cache=None,
+                 egress=None):
+        # Cross-process per-host spacing of requests (see shared_state.py)
+        self.shared_state = shared_state
+        self.host_interval = (host_interval if host_interval is not None
+                              else float(os.getenv('HOST_MIN_INTERVAL', 5)))
+        # JOB_BOARD_BASE_URL sends every board to one server as <base>/<source>
+        # (the stand-in board in loadtest.py); unset means the real sites
+        base_url = base_url or os.getenv('JOB_BOARD_BASE_URL')
+        if base_url:
+            self.base_urls = {source: f"{base_url.rstrip('/')}/{source}" for source in self.BASE_URLS}
+        else:
+            self.base_urls = dict(self.BASE_URLS)
+        # Multiplies the politeness sleeps; 0 disables them (load tests only)
+        self.sleep_scale = (sleep_scale if sleep_scale is not None
+                            else float(os.getenv('PARSER_SLEEP_SCALE', 1)))
+        # Pages fetched ahead of time (PagePrefetcher in prefetch.py), checked before each page
+        self.page_cache = page_cache
+        # Outbound routes (EGRESS_ROUTES, see egress.py); host_interval applies per route
+        self.egress = egress or EgressPool(shared_state=shared_state,
+                                           interval=self.host_interval if shared_state is not None else 0.0)
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
@@ -67,263 +110,299 @@ class InternationalJobParser:
         })
         return session
 
+    def _fetch(self, session, url, timeout=20):
+        # GET through an egress route, with latency recorded per host and status code
+        host = urlparse(url).netloc
+        with span('rate_limit', host=host) as rate_span:
+            route, waited = self.egress.acquire(host)
+            if rate_span is not None:
+                rate_span.attrs.update(route=route.name)
+        if waited > 0:
+            RATE_LIMIT_WAIT_SECONDS.inc(waited, host=host)
+        with span('fetch', url=url) as fetch_span:
+            started = time.perf_counter()
+            try:
+                response = self.egress.send(route, session, 'GET', url, timeout=timeout)
+            except Exception:
+                FETCH_SECONDS.observe(time.perf_counter() - started, host=host, status='error')
+                raise
+            FETCH_SECONDS.observe(time.perf_counter() - started, host=host, status=response.status_code)
+            if fetch_span is not None:
+                fetch_span.attrs.update(status=response.status_code, bytes=len(response.content))
+        response.encoding = 'utf-8'
+        return response
+
+    def _sleep(self, source, low, high):
+        # Politeness delay between requests
+        delay = random.uniform(low, high) * self.sleep_scale
+        if delay <= 0:
+            return
+        SLEEP_SECONDS.inc(delay, source=source)
+        with span('sleep', seconds=round(delay, 2)):
+            time.sleep(delay)
+
+    @staticmethod
+    def _parse_html(source, html):
+        with span('parse_html', source=source), PARSE_SECONDS.time(source=source):
+            return BeautifulSoup(html, 'html.parser')
+
+    @staticmethod
+    def _find_cards(soup, selectors):
+        # First selector that finds anything wins; its name is kept for the metrics
+        for name, find in selectors:
+            cards = find(soup)
+            if cards:
+                return cards, name
+        return [], 'none'
+
+    def new_session(self, source):
+        session = self.get_session()
+        if source == 'indeed':
+            # Set cookie to avoid blocking
+            session.cookies.set('CTK', 'test_cookie_value')
+        elif source == 'linkedin':
+            # Set English language for LinkedIn
+            session.headers['Accept-Language'] = 'en-US,en;q=0.9'
+        elif source == 'stepstone':
+            # StepStone is in German - set language
+            session.headers['Accept-Language'] = 'de-DE,de;q=0.9,en;q=0.8'
+        return session
+
+    def page_url(self, source, query, location, page=0):
+        base = self.base_urls[source]
+        if source == 'indeed':
+            # Indeed uses start parameter for pagination
+            return f"{base}/jobs?q={quote(query)}&l={quote(location)}&start={page * 10}"
+        if source == 'linkedin':
+            return f"{base}/jobs/search/?keywords={quote(query)}&location={quote(location)}&start={page * 25}"
+        if source == 'stepstone':
+            return f"{base}/jobs/{quote(query)}/in-{quote(location)}?page={page + 1}"
+        # EURES has no paging
+        return f"{base}/search-for-a-job?query={quote(query)}&location={quote(location)}"
+
+    def fetch_page(self, session, source, query, location, page=0):
+        """Fetch one result page and extract its jobs; None if the board refused it.
+
+        No politeness sleep here - callers schedule their own requests.
+        """
+        name = self.SOURCE_NAMES[source]
+        logger.info(f"📡 {name} page {page + 1}")
+        response = self._fetch(session, self.page_url(source, query, location, page),
+                               timeout=30 if source == 'eures' else 20)
+        if response.status_code != 200:
+            logger.warning(f"❌ Status {response.status_code}")
+            return None
+
+        # Embedded JSON when the page has it, the DOM selectors otherwise
+        jobs = self._extract_structured(source, response.text, location)
+        if jobs is not None:
+            return jobs
+
+        soup = self._parse_html(name, response.text)
+        with span('extract', source=name):
+            return getattr(self, f'_extract_{source}')(soup, location)
+
+    def _extract_structured(self, source, html, location):
+        name = self.SOURCE_NAMES[source]
+        with span('extract_json', source=name):
+            listings, how = extract_listings(source, html, self.BASE_URLS[source])
+            if not listings:
+                return None
+
+            if len(listings) > 15:
+                CARDS_DROPPED.inc(len(listings) - 15, source=name, selector=how, reason='limit')
+            page = JobPage(name)
+            jobs = []
+            for listing in listings[:15]:
+                title = listing['title']
+                if not title or len(title) < 3:
+                    CARDS_DROPPED.inc(source=name, selector=how, reason='no_title')
+                    continue
+                company = listing['company'] or 'Not specified'
+                CARDS_EXTRACTED.inc(source=name, selector=how)
+                jobs.append(JobRecord(
+                    page,
+                    title=title,
+                    company=company,
+                    location=listing['location'] or location,
+                    salary=listing['salary'] or 'Not specified',
+                    summary=listing['summary'] or f'{title} at {company}',
+                    link=listing['link'] or self.BASE_URLS[source]
+                ))
+
+        logger.info(f"📦 {name}: {len(jobs)} jobs from embedded {how} data")
+        # Nothing usable in the JSON: let the DOM selectors have a go
+        return jobs or None
+
+    def _prefetched(self, source, query, location, page):
+        # A prefetched page costs neither a request nor a politeness sleep
+        if self.page_cache is None:
+            return None
+        try:
+            return self.page_cache.get(source, query, location, page)
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetch cache: {e}")
+            return None
+
+    @traced('parse_indeed')
     def parse_indeed(self, query, location, start_page=0, max_pages=1):
         jobs = []
         logger.info(f"Searching Indeed: '{query}' in '{location}'")
 
         try:
-            session = self.get_session()
-            # Set cookie to avoid blocking
-            session.cookies.set('CTK', 'test_cookie_value')
+            session = self.new_session('indeed')
 
             # Loop through pages
             for page in range(start_page, start_page + max_pages):
                 try:
-                    # Indeed uses start parameter for pagination
-                    start = page * 10
-                    url = f"https://de.indeed.com/jobs?q={quote(query)}&l={quote(location)}&start={start}"
-                    logger.info(f"📡 Indeed page {page + 1}")
-                    
-                    # Get the page
-                    response = session.get(url, timeout=20)
-                    response.encoding = 'utf-8'
-                    
-                    # Check status
-                    if response.status_code != 200:
-                        logger.warning(f"❌ Status {response.status_code}")
-                        time.sleep(random.uniform(10, 15))
+                    prefetched = self._prefetched('indeed', query, location, page)
+                    if prefetched is not None:
+                        jobs.extend(prefetched)
                         continue
 
-                    # Parse HTML
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find job containers (multiple selectors for reliability)
-                    job_containers = soup.find_all('div', class_='job_seen_beacon')
-                    
-                    if not job_containers:
-                        job_containers = soup.find_all('div', {'data-jk': True})
-                    
-                    if not job_containers:
-                        job_containers = soup.find_all('td', class_='resultContent')
-                    
-                    if not job_containers:
-                        job_containers = soup.find_all('div', {'class': lambda x: x and 'cardOutline' in str(x)})
-                    
-                    logger.info(f"📦 Found {len(job_containers)} jobs")
-
-                    # Process each job
-                    for idx, container in enumerate(job_containers[:15]):
-                        try:
-                            # Extract job title
-                            title = None
-                            title_elem = container.find('h2', class_='jobTitle')
-                            if title_elem:
-                                title_link = title_elem.find(['a', 'span'])
-                                title = self.clean_text(title_link.get_text(strip=True)) if title_link else self.clean_text(title_elem.get_text(strip=True))
-                            
-                            # Try another way if not found
-                            if not title:
-                                title_elem = container.find('a', {'id': lambda x: x and x.startswith('job_')})
-                                if title_elem:
-                                    title = self.clean_text(title_elem.get_text(strip=True))
-                            
-                            # Skip if no title
-                            if not title or len(title) < 3:
-                                continue
-
-                            # Extract company
-                            company = 'Not specified'
-                            company_elem = container.find('span', {'data-testid': 'company-name'})
-                            if not company_elem:
-                                company_elem = container.find('span', class_='companyName')
-                            if company_elem:
-                                company = self.clean_text(company_elem.get_text(strip=True))
-
-                            # Extract location
-                            job_location = location
-                            location_elem = container.find('div', {'data-testid': 'text-location'})
-                            if not location_elem:
-                                location_elem = container.find('div', class_='companyLocation')
-                            if location_elem:
-                                job_location = self.clean_text(location_elem.get_text(strip=True))
-
-                            # Extract salary
-                            salary = 'Not specified'
-                            salary_elem = container.find('div', {'class': lambda x: x and 'salary' in str(x).lower()})
-                            if not salary_elem:
-                                salary_elem = container.find('span', {'data-testid': 'attribute_snippet_testid'})
-                            if salary_elem:
-                                salary = self.clean_text(salary_elem.get_text(strip=True))
-
-                            # Extract job link
-                            link = 'https://de.indeed.com'
-                            link_elem = container.find('a', {'data-jk': True})
-                            if not link_elem:
-                                link_elem = container.find('a', {'id': lambda x: x and x.startswith('job_')})
-                            
-                            if link_elem:
-                                job_id = link_elem.get('data-jk') or link_elem.get('id', '').replace('job_', '')
-                                if job_id:
-                                    link = f"https://de.indeed.com/viewjob?jk={job_id}"
-
-                            # Extract description
-                            desc_elem = container.find('div', class_='slider_container')
-                            if not desc_elem:
-                                desc_elem = container.find('div', {'class': lambda x: x and 'snippet' in str(x).lower()})
-                            summary = self.clean_text(desc_elem.get_text(strip=True, separator=' '))[:400] if desc_elem else f'{title} at {company}'
-
-                            # Add job to list
-                            jobs.append({
-                                'title': title,
-                                'company': company,
-                                'location': job_location,
-                                'salary': salary,
-                                'summary': summary,
-                                'link': link,
-                                'source': 'Indeed',
-                                'posted_date': 'recent',
-                                'is_recent': True,
-                                'parsed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            })
-                            
-                            logger.info(f"✅ {title[:50]} @ {company}")
-
-                        except Exception as e:
-                            logger.debug(f"⚠️ Error with job {idx}: {e}")
-                            continue
+                    page_jobs = self.fetch_page(session, 'indeed', query, location, page)
+                    if page_jobs:
+                        jobs.extend(page_jobs)
 
                     # Pause to not overload server
-                    time.sleep(random.uniform(10, 15))
+                    self._sleep('Indeed', 10, 15)
 
                 except Exception as e:
                     logger.error(f"❌ Error on page {page}: {e}")
-                    time.sleep(random.uniform(8, 12))
+                    self._sleep('Indeed', 8, 12)
                     continue
 
         except Exception as e:
             logger.error(f"❌ Indeed error: {e}")
 
         logger.info(f"🎯 Indeed: {len(jobs)} jobs")
-    
+        return jobs
+
+    def _extract_indeed(self, soup, location):
+        jobs = []
+        page = JobPage('Indeed')
+
+        # Find job containers (multiple selectors for reliability)
+        job_containers, selector = self._find_cards(soup, [
+            ('job_seen_beacon', lambda s: s.find_all('div', class_='job_seen_beacon')),
+            ('data-jk', lambda s: s.find_all('div', {'data-jk': True})),
+            ('resultContent', lambda s: s.find_all('td', class_='resultContent')),
+            ('cardOutline', lambda s: s.find_all('div', {'class': lambda x: x and 'cardOutline' in str(x)})),
+        ])
+        
+        logger.info(f"📦 Found {len(job_containers)} jobs")
+        if len(job_containers) > 15:
+            CARDS_DROPPED.inc(len(job_containers) - 15, source='Indeed', selector=selector, reason='limit')
+
+        # Process each job
+        for idx, container in enumerate(job_containers[:15]):
+            try:
+                # Extract job title
+                title = None
+                title_elem = container.find('h2', class_='jobTitle')
+                if title_elem:
+                    title_link = title_elem.find(['a', 'span'])
+                    title = self.clean_text(title_link.get_text(strip=True)) if title_link else self.clean_text(title_elem.get_text(strip=True))
+                
+                # Try another way if not found
+                if not title:
+                    title_elem = container.find('a', {'id': lambda x: x and x.startswith('job_')})
+                    if title_elem:
+                        title = self.clean_text(title_elem.get_text(strip=True))
+                
+                # Skip if no title
+                if not title or len(title) < 3:
+                    CARDS_DROPPED.inc(source='Indeed', selector=selector, reason='no_title')
+                    continue
+
+                # Extract company
+                company = 'Not specified'
+                company_elem = container.find('span', {'data-testid': 'company-name'})
+                if not company_elem:
+                    company_elem = container.find('span', class_='companyName')
+                if company_elem:
+                    company = self.clean_text(company_elem.get_text(strip=True))
+
+                # Extract location
+                job_location = location
+                location_elem = container.find('div', {'data-testid': 'text-location'})
+                if not location_elem:
+                    location_elem = container.find('div', class_='companyLocation')
+                if location_elem:
+                    job_location = self.clean_text(location_elem.get_text(strip=True))
+
+                # Extract salary
+                salary = 'Not specified'
+                salary_elem = container.find('div', {'class': lambda x: x and 'salary' in str(x).lower()})
+                if not salary_elem:
+                    salary_elem = container.find('span', {'data-testid': 'attribute_snippet_testid'})
+                if salary_elem:
+                    salary = self.clean_text(salary_elem.get_text(strip=True))
+
+                # Extract job link
+                link = 'https://de.indeed.com'
+                link_elem = container.find('a', {'data-jk': True})
+                if not link_elem:
+                    link_elem = container.find('a', {'id': lambda x: x and x.startswith('job_')})
+                
+                if link_elem:
+                    job_id = link_elem.get('data-jk') or link_elem.get('id', '').replace('job_', '')
+                    if job_id:
+                        link = f"https://de.indeed.com/viewjob?jk={job_id}"
+
+                # Extract description
+                desc_elem = container.find('div', class_='slider_container')
+                if not desc_elem:
+                    desc_elem = container.find('div', {'class': lambda x: x and 'snippet' in str(x).lower()})
+                summary = self.clean_text(desc_elem.get_text(strip=True, separator=' '))[:400] if desc_elem else f'{title} at {company}'
+
+                # Add job to list
+                CARDS_EXTRACTED.inc(source='Indeed', selector=selector)
+                jobs.append(JobRecord(
+                    page,
+                    title=title,
+                    company=company,
+                    location=job_location,
+                    salary=salary,
+                    summary=summary,
+                    link=link
+                ))
+                
+                logger.info(f"✅ {title[:50]} @ {company}")
+
+            except Exception as e:
+                logger.debug(f"⚠️ Error with job {idx}: {e}")
+                CARDS_DROPPED.inc(source='Indeed', selector=selector, reason='error')
+                continue
+
+        return jobs
+
+    @traced('parse_linkedin')
     def parse_linkedin(self, query, location, start_page=0, max_pages=1):
         jobs = []
         logger.info(f"Searching LinkedIn: '{query}' in '{location}'")
 
         try:
-            session = self.get_session()
-            # Set English language for LinkedIn
-            session.headers['Accept-Language'] = 'en-US,en;q=0.9'
+            session = self.new_session('linkedin')
 
             # Loop through pages
             for page in range(start_page, start_page + max_pages):
                 try:
-                    start = page * 25
-                    url = f"https://www.linkedin.com/jobs/search/?keywords={quote(query)}&location={quote(location)}&start={start}"
-                    logger.info(f"📡 LinkedIn page {page + 1}")
-                    
-                    # Get the page
-                    response = session.get(url, timeout=20)
-                    response.encoding = 'utf-8'
-
-                    # Check status
-                    if response.status_code != 200:
-                        logger.warning(f"❌ Status {response.status_code}")
-                        time.sleep(random.uniform(10, 15))
+                    prefetched = self._prefetched('linkedin', query, location, page)
+                    if prefetched is not None:
+                        jobs.extend(prefetched)
                         continue
 
-                    # Parse HTML
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find job cards (multiple selectors for reliability)
-                    job_cards = []
-                    job_cards = soup.find_all('div', {'class': lambda x: x and 'base-card' in str(x)})
-                    
-                    if not job_cards:
-                        job_cards = soup.find_all('div', {'class': lambda x: x and 'job-search-card' in str(x)})
-                    
-                    if not job_cards:
-                        job_cards = soup.find_all('li', {'class': lambda x: x and 'result-card' in str(x)})
-                    
-                    logger.info(f"📦 Found {len(job_cards)} jobs")
-
-                    # Process each card
-                    for idx, card in enumerate(job_cards[:15]):
-                        try:
-                            # Extract title
-                            title = None
-                            title_elem = card.find('h3', {'class': lambda x: x and 'base-search-card__title' in str(x)})
-                            if not title_elem:
-                                title_elem = card.find('h3')
-                            if not title_elem:
-                                title_elem = card.find('a', {'class': lambda x: x and 'title' in str(x).lower()})
-                            
-                            if title_elem:
-                                title = self.clean_text(title_elem.get_text(strip=True))
-                            
-                            if not title or len(title) < 3:
-                                continue
-
-                            # Extract company
-                            company = 'Not specified'
-                            company_elem = card.find('h4', {'class': lambda x: x and 'base-search-card__subtitle' in str(x)})
-                            if not company_elem:
-                                company_elem = card.find('a', {'class': lambda x: x and 'company' in str(x).lower()})
-                            if company_elem:
-                                company = self.clean_text(company_elem.get_text(strip=True))
-
-                            # Extract location
-                            job_location = location
-                            location_elem = card.find('span', {'class': lambda x: x and 'job-search-card__location' in str(x)})
-                            if location_elem:
-                                job_location = self.clean_text(location_elem.get_text(strip=True))
-
-                            # Extract salary
-                            salary = 'Not specified'
-                            salary_elem = card.find(string=re.compile(r'[\$€£]\s*\d'))
-                            if salary_elem:
-                                salary = self.clean_text(salary_elem.strip())
-
-                            # Extract link
-                            link = 'https://linkedin.com'
-                            link_elem = card.find('a', {'class': lambda x: x and 'base-card__full-link' in str(x)})
-                            if not link_elem:
-                                link_elem = card.find('a', href=True)
-                            
-                            if link_elem and link_elem.get('href'):
-                                href = link_elem['href']
-                                if '?' in href:
-                                    href = href.split('?')[0]
-                                link = href
-
-                            # Extract description
-                            summary = self.clean_text(card.get_text(strip=True, separator=' '))[:400]
-
-                            # Add job to list
-                            jobs.append({
-                                'title': title,
-                                'company': company,
-                                'location': job_location,
-                                'salary': salary,
-                                'summary': summary or f'{title} at {company}',
-                                'link': link,
-                                'source': 'LinkedIn',
-                                'posted_date': 'recent',
-                                'is_recent': True,
-                                'parsed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            })
-                            
-                            logger.info(f"✅ {title[:50]} @ {company}")
-
-                        except Exception as e:
-                            logger.debug(f"⚠️ Error with card {idx}: {e}")
-                            continue
+                    page_jobs = self.fetch_page(session, 'linkedin', query, location, page)
+                    if page_jobs:
+                        jobs.extend(page_jobs)
 
                     # Pause
-                    time.sleep(random.uniform(10, 15))
+                    self._sleep('LinkedIn', 10, 15)
 
                 except Exception as e:
                     logger.error(f"❌ Error on page {page}: {e}")
-                    time.sleep(random.uniform(8, 12))
+                    self._sleep('LinkedIn', 8, 12)
                     continue
 
         except Exception as e:
@@ -332,128 +411,121 @@ class InternationalJobParser:
         logger.info(f"🎯 LinkedIn: {len(jobs)} jobs")
         return jobs
 
+    def _extract_linkedin(self, soup, location):
+        jobs = []
+        page = JobPage('LinkedIn')
+
+        # Find job cards (multiple selectors for reliability)
+        job_cards, selector = self._find_cards(soup, [
+            ('base-card', lambda s: s.find_all('div', {'class': lambda x: x and 'base-card' in str(x)})),
+            ('job-search-card', lambda s: s.find_all('div', {'class': lambda x: x and 'job-search-card' in str(x)})),
+            ('result-card', lambda s: s.find_all('li', {'class': lambda x: x and 'result-card' in str(x)})),
+        ])
+        
+        logger.info(f"📦 Found {len(job_cards)} jobs")
+        if len(job_cards) > 15:
+            CARDS_DROPPED.inc(len(job_cards) - 15, source='LinkedIn', selector=selector, reason='limit')
+
+        # Process each card
+        for idx, card in enumerate(job_cards[:15]):
+            try:
+                # Extract title
+                title = None
+                title_elem = card.find('h3', {'class': lambda x: x and 'base-search-card__title' in str(x)})
+                if not title_elem:
+                    title_elem = card.find('h3')
+                if not title_elem:
+                    title_elem = card.find('a', {'class': lambda x: x and 'title' in str(x).lower()})
+                
+                if title_elem:
+                    title = self.clean_text(title_elem.get_text(strip=True))
+                
+                if not title or len(title) < 3:
+                    CARDS_DROPPED.inc(source='LinkedIn', selector=selector, reason='no_title')
+                    continue
+
+                # Extract company
+                company = 'Not specified'
+                company_elem = card.find('h4', {'class': lambda x: x and 'base-search-card__subtitle' in str(x)})
+                if not company_elem:
+                    company_elem = card.find('a', {'class': lambda x: x and 'company' in str(x).lower()})
+                if company_elem:
+                    company = self.clean_text(company_elem.get_text(strip=True))
+
+                # Extract location
+                job_location = location
+                location_elem = card.find('span', {'class': lambda x: x and 'job-search-card__location' in str(x)})
+                if location_elem:
+                    job_location = self.clean_text(location_elem.get_text(strip=True))
+
+                # Extract salary
+                salary = 'Not specified'
+                salary_elem = card.find(string=re.compile(r'[\$€£]\s*\d'))
+                if salary_elem:
+                    salary = self.clean_text(salary_elem.strip())
+
+                # Extract link
+                link = 'https://linkedin.com'
+                link_elem = card.find('a', {'class': lambda x: x and 'base-card__full-link' in str(x)})
+                if not link_elem:
+                    link_elem = card.find('a', href=True)
+                
+                if link_elem and link_elem.get('href'):
+                    href = link_elem['href']
+                    if '?' in href:
+                        href = href.split('?')[0]
+                    link = href
+
+                # Extract description
+                summary = self.clean_text(card.get_text(strip=True, separator=' '))[:400]
+
+                # Add job to list
+                CARDS_EXTRACTED.inc(source='LinkedIn', selector=selector)
+                jobs.append(JobRecord(
+                    page,
+                    title=title,
+                    company=company,
+                    location=job_location,
+                    salary=salary,
+                    summary=summary or f'{title} at {company}',
+                    link=link
+                ))
+                
+                logger.info(f"✅ {title[:50]} @ {company}")
+
+            except Exception as e:
+                logger.debug(f"⚠️ Error with card {idx}: {e}")
+                CARDS_DROPPED.inc(source='LinkedIn', selector=selector, reason='error')
+                continue
+
+        return jobs
+
+    @traced('parse_stepstone')
     def parse_stepstone(self, query, location, start_page=0, max_pages=1):
         jobs = []
         logger.info(f"Searching StepStone: '{query}' in '{location}'")
 
         try:
-            session = self.get_session()
-            # StepStone is in German - set language
-            session.headers['Accept-Language'] = 'de-DE,de;q=0.9,en;q=0.8'
+            session = self.new_session('stepstone')
 
+            # Loop through pages
             for page in range(start_page, start_page + max_pages):
                 try:
-                    # Build URL for StepStone
-                    url = f"https://www.stepstone.de/jobs/{quote(query)}/in-{quote(location)}?page={page + 1}"
-                    logger.info(f"📡 StepStone page {page + 1}")
-                    
-                    # Get the page
-                    response = session.get(url, timeout=20)
-                    response.encoding = 'utf-8'
-
-                    # Check status
-                    if response.status_code != 200:
-                        logger.warning(f"❌ Status {response.status_code}")
-                        time.sleep(random.uniform(10, 15))
+                    prefetched = self._prefetched('stepstone', query, location, page)
+                    if prefetched is not None:
+                        jobs.extend(prefetched)
                         continue
 
-                    # Parse HTML
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find job items (multiple selectors for reliability)
-                    job_items = []
-                    job_items = soup.find_all('article', {'data-at': 'job-item'})
-                    
-                    if not job_items:
-                        job_items = soup.find_all('article', {'class': lambda x: x and 'listing-item' in str(x)})
-                    
-                    if not job_items:
-                        job_items = soup.find_all('article', {'data-id': True})
-                    
-                    logger.info(f"📦 Found {len(job_items)} jobs")
-
-                    # Process each job
-                    for idx, item in enumerate(job_items[:15]):
-                        try:
-                            # Extract title
-                            title = None
-                            title_elem = item.find('a', {'data-at': 'job-item-title'})
-                            if not title_elem:
-                                title_elem = item.find(['h2', 'h3'])
-                            if not title_elem:
-                                title_elem = item.find('a', href=re.compile(r'/jobs/'))
-                            
-                            if title_elem:
-                                title = self.clean_text(title_elem.get_text(strip=True))
-                            
-                            # Skip if no title
-                            if not title or len(title) < 3:
-                                continue
-
-                            # Extract company
-                            company = 'Not specified'
-                            company_elem = item.find('a', {'data-at': 'job-item-company-name'})
-                            if not company_elem:
-                                company_elem = item.find('span', {'class': lambda x: x and 'company' in str(x).lower()})
-                            if company_elem:
-                                company = self.clean_text(company_elem.get_text(strip=True))
-
-                            # Extract location
-                            job_location = location
-                            location_elem = item.find('span', {'data-at': 'job-item-location'})
-                            if not location_elem:
-                                location_elem = item.find('li', {'class': lambda x: x and 'location' in str(x).lower()})
-                            if location_elem:
-                                job_location = self.clean_text(location_elem.get_text(strip=True))
-
-                            # Extract salary
-                            salary = 'Not specified'
-                            salary_elem = item.find(string=re.compile(r'€\s*\d|EUR'))
-                            if salary_elem:
-                                salary = self.clean_text(salary_elem.strip())
-
-                            # Extract link
-                            link = 'https://www.stepstone.de'
-                            link_elem = item.find('a', {'data-at': 'job-item-title'})
-                            if not link_elem:
-                                link_elem = item.find('a', href=re.compile(r'/jobs/'))
-                            
-                            if link_elem and link_elem.get('href'):
-                                href = link_elem['href']
-                                if href.startswith('/'):
-                                    link = f"https://www.stepstone.de{href}"
-                                else:
-                                    link = href
-
-                            # Extract description
-                            summary = self.clean_text(item.get_text(strip=True, separator=' '))[:400]
-
-                            # Add job to list
-                            jobs.append({
-                                'title': title,
-                                'company': company,
-                                'location': job_location,
-                                'salary': salary,
-                                'summary': summary or f'{title} at {company}',
-                                'link': link,
-                                'source': 'StepStone',
-                                'posted_date': 'recent',
-                                'is_recent': True,
-                                'parsed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            })
-                            
-                            logger.info(f"✅ {title[:50]} @ {company}")
-
-                        except Exception as e:
-                            logger.debug(f"⚠️ Error with job {idx}: {e}")
-                            continue
+                    page_jobs = self.fetch_page(session, 'stepstone', query, location, page)
+                    if page_jobs:
+                        jobs.extend(page_jobs)
 
                     # Pause
-                    time.sleep(random.uniform(10, 15))
+                    self._sleep('StepStone', 10, 15)
 
                 except Exception as e:
                     logger.error(f"❌ Error on page {page}: {e}")
-                    time.sleep(random.uniform(8, 12))
+                    self._sleep('StepStone', 8, 12)
                     continue
 
         except Exception as e:
@@ -462,51 +534,109 @@ class InternationalJobParser:
         logger.info(f"🎯 StepStone: {len(jobs)} jobs")
         return jobs
 
-    def parse_eurojobs(self, query, location, start_page=0, max_pages=1):
+    def _extract_stepstone(self, soup, location):
         jobs = []
-        logger.info(f"Searching EURES: '{query}' in '{location}'")
-
-        try:
-            session = self.get_session()
-            url = f"https://eures.europa.eu/search-for-a-job?query={quote(query)}&location={quote(location)}"
-            logger.info(f"📡 EURES")
-            
-            response = session.get(url, timeout=30)
-            response.encoding = 'utf-8'
+        page = JobPage('StepStone')
+
+        # Find job items (multiple selectors for reliability)
+        job_items, selector = self._find_cards(soup, [
+            ('job-item', lambda s: s.find_all('article', {'data-at': 'job-item'})),
+            ('listing-item', lambda s: s.find_all('article', {'class': lambda x: x and 'listing-item' in str(x)})),
+            ('data-id', lambda s: s.find_all('article', {'data-id': True})),
+        ])
+        
+        logger.info(f"📦 Found {len(job_items)} jobs")
+        if len(job_items) > 15:
+            CARDS_DROPPED.inc(len(job_items) - 15, source='StepStone', selector=selector, reason='limit')
+
+        # Process each job
+        for idx, item in enumerate(job_items[:15]):
+            try:
+                # Extract title
+                title = None
+                title_elem = item.find('a', {'data-at': 'job-item-title'})
+                if not title_elem:
+                    title_elem = item.find(['h2', 'h3'])
+                if not title_elem:
+                    title_elem = item.find('a', href=re.compile(r'/jobs/'))
+                
+                if title_elem:
+                    title = self.clean_text(title_elem.get_text(strip=True))
+                
+                # Skip if no title
+                if not title or len(title) < 3:
+                    CARDS_DROPPED.inc(source='StepStone', selector=selector, reason='no_title')
+                    continue
 
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                job_items = soup.find_all(['article', 'div'], {'class': lambda x: x and 'job' in str(x).lower()})
+                # Extract company
+                company = 'Not specified'
+                company_elem = item.find('a', {'data-at': 'job-item-company-name'})
+                if not company_elem:
+                    company_elem = item.find('span', {'class': lambda x: x and 'company' in str(x).lower()})
+                if company_elem:
+                    company = self.clean_text(company_elem.get_text(strip=True))
+
+                # Extract location
+                job_location = location
+                location_elem = item.find('span', {'data-at': 'job-item-location'})
+                if not location_elem:
+                    location_elem = item.find('li', {'class': lambda x: x and 'location' in str(x).lower()})
+                if location_elem:
+                    job_location = self.clean_text(location_elem.get_text(strip=True))
+
+                # Extract salary
+                salary = 'Not specified'
+                salary_elem = item.find(string=re.compile(r'€\s*\d|EUR'))
+                if salary_elem:
+                    salary = self.clean_text(salary_elem.strip())
+
+                # Extract link
+                link = 'https://www.stepstone.de'
+                link_elem = item.find('a', {'data-at': 'job-item-title'})
+                if not link_elem:
+                    link_elem = item.find('a', href=re.compile(r'/jobs/'))
                 
-                logger.info(f"📦 Found {len(job_items)} potential jobs")
+                if link_elem and link_elem.get('href'):
+                    href = link_elem['href']
+                    if href.startswith('/'):
+                        link = f"https://www.stepstone.de{href}"
+                    else:
+                        link = href
+
+                # Extract description
+                summary = self.clean_text(item.get_text(strip=True, separator=' '))[:400]
+
+                # Add job to list
+                CARDS_EXTRACTED.inc(source='StepStone', selector=selector)
+                jobs.append(JobRecord(
+                    page,
+                    title=title,
+                    company=company,
+                    location=job_location,
+                    salary=salary,
+                    summary=summary or f'{title} at {company}',
+                    link=link
+                ))
                 
-                for idx, item in enumerate(job_items[:10]):
-                    try:
-                        title_elem = item.find(['h2', 'h3', 'h4', 'a'])
-                        if not title_elem:
-                            continue
-                        
-                        title = self.clean_text(title_elem.get_text(strip=True))
-                        if len(title) < 5:
-                            continue
+                logger.info(f"✅ {title[:50]} @ {company}")
 
-                        jobs.append({
-                            'title': title,
-                            'company': 'Various European Employers',
-                            'location': location,
-                            'salary': 'Not specified',
-                            'summary': self.clean_text(item.get_text(strip=True, separator=' '))[:300],
-                            'link': 'https://eures.europa.eu',
-                            'source': 'EURES',
-                            'posted_date': 'recent',
-                            'is_recent': True,
-                            'parsed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        })
-                        
-                        logger.info(f"✅ {title[:50]}")
-                    except Exception as e:
-                        logger.debug(f"⚠️ EURES card {idx} error: {e}")
-                        continue
+            except Exception as e:
+                logger.debug(f"⚠️ Error with job {idx}: {e}")
+                CARDS_DROPPED.inc(source='StepStone', selector=selector, reason='error')
+                continue
+
+        return jobs
+
+    @traced('parse_eurojobs')
+    def parse_eurojobs(self, query, location, start_page=0, max_pages=1):
+        jobs = []
+        logger.info(f"Searching EURES: '{query}' in '{location}'")
+
+        try:
+            session = self.new_session('eures')
+            page_jobs = self.fetch_page(session, 'eures', query, location)
+            if page_jobs:
+                jobs.extend(page_jobs)
 
         except Exception as e:
             logger.error(f"❌ EURES error: {e}")
@@ -514,6 +644,48 @@ class InternationalJobParser:
         logger.info(f"🎯 EURES: {len(jobs)} jobs")
         return jobs
 
+    def _extract_eures(self, soup, location):
+        jobs = []
+        page = JobPage('EURES')
+        job_items = soup.find_all(['article', 'div'], {'class': lambda x: x and 'job' in str(x).lower()})
+        selector = 'job-class'
+        
+        logger.info(f"📦 Found {len(job_items)} potential jobs")
+        if len(job_items) > 10:
+            CARDS_DROPPED.inc(len(job_items) - 10, source='EURES', selector=selector, reason='limit')
+        
+        for idx, item in enumerate(job_items[:10]):
+            try:
+                title_elem = item.find(['h2', 'h3', 'h4', 'a'])
+                if not title_elem:
+                    CARDS_DROPPED.inc(source='EURES', selector=selector, reason='no_title')
+                    continue
+                
+                title = self.clean_text(title_elem.get_text(strip=True))
+                if len(title) < 5:
+                    CARDS_DROPPED.inc(source='EURES', selector=selector, reason='no_title')
+                    continue
+
+                CARDS_EXTRACTED.inc(source='EURES', selector=selector)
+                jobs.append(JobRecord(
+                    page,
+                    title=title,
+                    company='Various European Employers',
+                    location=location,
+                    salary='Not specified',
+                    summary=self.clean_text(item.get_text(strip=True, separator=' '))[:300],
+                    link='https://eures.europa.eu'
+                ))
+                
+                logger.info(f"✅ {title[:50]}")
+            except Exception as e:
+                logger.debug(f"⚠️ EURES card {idx} error: {e}")
+                CARDS_DROPPED.inc(source='EURES', selector=selector, reason='error')
+                continue
+
+        return jobs
+
+    @traced('parse_all_sites')
     def parse_all_sites(self, query, location, sources, 
                        page=0, max_pages=1):
         all_jobs = []
@@ -530,7 +702,7 @@ class InternationalJobParser:
             
             for source in sources:
                 if source in parser_map:
-                    future = executor.submit(parser_map[source], query, location, page, max_pages)
+                    future = executor.submit(bind(parser_map[source]), query, location, page, max_pages)
                     futures[future] = source
             
             for future in futures:
@@ -546,10 +718,15 @@ class InternationalJobParser:
         return all_jobs
 
     @staticmethod
+    @traced('filter_jobs')
     def filter_jobs(jobs, min_salary=None, 
                    experience_level=None, only_recent=True):
-        filtered = []
-        
+        return list(InternationalJobParser.iter_filtered_jobs(jobs, min_salary, experience_level, only_recent))
+
+    @staticmethod
+    def iter_filtered_jobs(jobs, min_salary=None, 
+                           experience_level=None, only_recent=True):
+        # Lazy version of filter_jobs: takes any iterable, yields the jobs that pass
         for job in jobs:
             if only_recent and not job.get('is_recent', False):
                 continue
@@ -574,6 +751,4 @@ class InternationalJobParser:
                 except:
                     pass
             
-            filtered.append(job)
-        
-        return filtered
\ No newline at end of file
+            yield job
\ No newline at end of file
@@ -0,0 +1,165 @@
+# ==================== prefetch.py ====================
+# Speculative prefetch of the next result page after a search
+# Runs only on spare per-host request budget; results live briefly in shared_state.db
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+from metrics import CACHE_REQUESTS, PREFETCH_PAGES
+
+
+logger = logging.getLogger(__name__)
+
+
+def page_key(source, query, location, page):
+    # Case/whitespace variants of a search share prefetched pages
+    return json.dumps([source, ' '.join(query.lower().split()), ' '.join(location.lower().split()), page])
+
+
+class PagePrefetcher:
+
+    def __init__(self, parser, shared_state, ttl=None, depth=None, max_backlog=None, budget=None,
+                 window=60, max_entries=None, max_queue=100):
+        self.parser = parser
+        self.shared_state = shared_state
+        # How long a prefetched page may be served
+        self.ttl = ttl if ttl is not None else float(os.getenv('PREFETCH_TTL', 120))
+        # Pages ahead of the last one served, per source
+        self.depth = depth if depth is not None else int(os.getenv('PREFETCH_DEPTH', 1))
+        # Spare budget: only prefetch when the host's next free slot is at most this far away...
+        self.max_backlog = (max_backlog if max_backlog is not None
+                            else float(os.getenv('PREFETCH_MAX_BACKLOG', 10)))
+        # ...and at most this many speculative pages per host per window (seconds)
+        self.budget = budget if budget is not None else int(os.getenv('PREFETCH_BUDGET', 6))
+        self.window = window
+        self.max_entries = max_entries or int(os.getenv('PREFETCH_MAX_ENTRIES', 500))
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = set()
+        self._spent = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.depth > 0 and self.budget > 0
+
+    # ---------- Lookups (parser side) ----------
+
+    def get(self, source, query, location, page):
+        """Jobs of a prefetched page, or None"""
+        jobs, expired = self.shared_state.get_page(page_key(source, query, location, page))
+        if expired:
+            PREFETCH_PAGES.inc(source=source, outcome='expired')
+        CACHE_REQUESTS.inc(cache='prefetch', result='hit' if jobs is not None else 'miss')
+        if jobs is not None:
+            PREFETCH_PAGES.inc(source=source, outcome='used')
+            logger.info(f"⚡ {source} page {page + 1} served from prefetch")
+        return jobs
+
+    # ---------- Scheduling (API side) ----------
+
+    def schedule(self, sources, query, location, next_page):
+        """Queue pages next_page .. next_page + depth - 1 of every paged source"""
+        if not self.enabled:
+            return 0
+        self._ensure_worker()
+        queued = 0
+        for page in range(next_page, next_page + self.depth):
+            for source in sources:
+                if source not in self.parser.PAGED_SOURCES:
+                    continue
+                key = page_key(source, query, location, page)
+                with self._lock:
+                    if key in self._pending:
+                        continue
+                    self._pending.add(key)
+                try:
+                    self._queue.put_nowait((key, source, query, location, page))
+                    queued += 1
+                except queue.Full:
+                    # Speculative work is the first thing to go
+                    with self._lock:
+                        self._pending.discard(key)
+                    PREFETCH_PAGES.inc(source=source, outcome='skipped_budget')
+        return queued
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _take_budget(self, host):
+        # Sliding window of speculative requests per host
+        now = time.monotonic()
+        with self._lock:
+            spent = self._spent[host]
+            while spent and spent[0] <= now - self.window:
+                spent.popleft()
+            if len(spent) >= self.budget:
+                return False
+            spent.append(now)
+            return True
+
+    def _run(self):
+        sessions = {}
+        while not self._stop.is_set():
+            try:
+                key, source, query, location, page = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self._prefetch(sessions, key, source, query, location, page)
+            except Exception as e:
+                PREFETCH_PAGES.inc(source=source, outcome='failed')
+                logger.error(f"❌ Prefetch {source} page {page + 1}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+    def _prefetch(self, sessions, key, source, query, location, page):
+        if self.shared_state.has_page(key):
+            return
+
+        url = self.parser.page_url(source, query, location, page)
+        host = urlparse(url).netloc
+        # Real searches queued on this host come first: a tight budget discards the guess
+        if self.parser.egress.backlog(host) > self.max_backlog:
+            PREFETCH_PAGES.inc(source=source, outcome='skipped_busy')
+            return
+        if not self._take_budget(host):
+            PREFETCH_PAGES.inc(source=source, outcome='skipped_budget')
+            return
+
+        session = sessions.get(source)
+        if session is None:
+            session = sessions[source] = self.parser.new_session(source)
+        jobs = self.parser.fetch_page(session, source, query, location, page)
+        if jobs is None:
+            PREFETCH_PAGES.inc(source=source, outcome='failed')
+            return
+
+        self.shared_state.put_page(key, jobs, self.ttl, self.max_entries)
+        PREFETCH_PAGES.inc(source=source, outcome='fetched')
+        logger.info(f"🔮 Prefetched {source} page {page + 1}: {len(jobs)} jobs")
+
+        # Same politeness as a crawl between two pages
+        self._stop.wait(random.uniform(10, 15) * self.parser.sleep_scale)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
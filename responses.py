@@ -0,0 +1,213 @@
+# ==================== responses.py ====================
+# Response helpers for the API: fast JSON, gzip/brotli compression,
+# ETag/Last-Modified validators and field subsets
+
+import hashlib
+import json
+import zlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from metrics import CACHE_REQUESTS
+from job_record import json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class FastJSONResponse(JSONResponse):
+    # orjson when available, compact stdlib json otherwise
+
+    def render(self, content):
+        if orjson is not None:
+            return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8')
+
+
+def select_fields(items, fields):
+    # fields="title,link" -> only those keys of each dict
+    if not fields:
+        return items
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+    return [{key: item[key] for key in fields if key in item} for item in items]
+
+
+def _http_date(timestamp):
+    # SQLite CURRENT_TIMESTAMP (UTC, "YYYY-MM-DD HH:MM:SS") -> HTTP date
+    dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    return format_datetime(dt, usegmt=True)
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in candidates or etag in candidates
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def conditional_json(request, version, build, cache_control='no-cache'):
+    """Answer 304 when the data version is unchanged, otherwise build and send the JSON"""
+    # The version row changes on every write, so the request itself only has to
+    # be hashed in: same version + same path and query string = same body
+    key = hashlib.blake2b(f'{request.url.path}?{request.query_params}'.encode('utf-8'), digest_size=6).hexdigest()
+    etag = f'W/"{version["name"]}-{version["version"]}-{key}"'
+    last_modified = _http_date(version['updated_at']) if version.get('updated_at') else None
+
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if last_modified:
+        headers['Last-Modified'] = last_modified
+
+    if _not_modified(request, etag, last_modified):
+        CACHE_REQUESTS.inc(cache='api_etag', result='hit')
+        return Response(status_code=304, headers=headers)
+
+    CACHE_REQUESTS.inc(cache='api_etag', result='miss')
+    content = await build()
+    return FastJSONResponse(content, headers=headers)
+
+
+# ---------- Compression ----------
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/', 'application/javascript')
+
+
+def choose_encoding(accept_encoding):
+    # Prefer brotli, then gzip; honours "q=0" exclusions
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        pieces = part.strip().split(';')
+        name = pieces[0].strip()
+        q = 1.0
+        for param in pieces[1:]:
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name] = q
+
+    def ok(name):
+        return accepted.get(name, accepted.get('*', 0)) > 0
+
+    if brotli is not None and ok('br'):
+        return 'br'
+    if ok('gzip'):
+        return 'gzip'
+    return None
+
+
+class _Compressor:
+
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._obj.process
+            self._sync = self._obj.flush
+            self._finish = self._obj.finish
+        else:
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress = self._obj.compress
+            self._sync = lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._obj.flush
+
+    def compress(self, data, final=False):
+        out = self._compress(data) if data else b''
+        # Streamed chunks are flushed so clients see each one as it is produced
+        return out + (self._finish() if final else self._sync())
+
+
+class CompressionMiddleware:
+    """gzip/brotli for JSON, text and NDJSON responses, including streamed ones"""
+
+    def __init__(self, app, minimum_size=500, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message['type'] == 'http.response.start':
+                start_message = message
+                headers = Headers(raw=message['headers'])
+                content_type = headers.get('content-type', '')
+                passthrough = (
+                    'content-encoding' in headers
+                    or message['status'] in (204, 304)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if compressor is None:
+                # First body chunk decides: small one-shot bodies go out as they are
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start_message['headers'])
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+
+                if not more_body:
+                    compressed = compressor.compress(body, final=True)
+                    headers['Content-Length'] = str(len(compressed))
+                    await send(start_message)
+                    await send({'type': 'http.response.body', 'body': compressed})
+                    return
+
+                if 'content-length' in headers:
+                    del headers['Content-Length']
+                await send(start_message)
+
+            chunk = compressor.compress(body, final=not more_body)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
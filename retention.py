@@ -0,0 +1,125 @@
+# ==================== retention.py ====================
+# Deletes expired jobs in small indexed batches and reclaims the freed space
+# Runs on a schedule in a background thread, or on demand via the API
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from metrics import DB_COMMIT_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionManager:
+
+    def __init__(self, db, days=None, batch_size=500, pause=0.05,
+                 interval_hours=None, vacuum_pages=2000, shared_state=None):
+        self.db = db
+        # With several workers only the lease holder runs the scheduled purge
+        self.shared_state = shared_state
+        self.days = days if days is not None else int(os.getenv('RETENTION_DAYS', 30))
+        self.batch_size = batch_size
+        # Sleep between batches so other writers can grab the lock
+        self.pause = pause
+        self.interval_hours = (interval_hours if interval_hours is not None
+                               else float(os.getenv('RETENTION_INTERVAL_HOURS', 24)))
+        self.vacuum_pages = vacuum_pages
+        # Free pages the last vacuum left for the next run (None = not checked yet)
+        self.freelist_remaining = None
+        self.last_report = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def purge(self, days=None):
+        days = self.days if days is None else days
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+        # Only one purge at a time, scheduled or manual
+        with self._lock:
+            started = time.perf_counter()
+            deleted = 0
+            batches = 0
+            lock_time = 0.0
+            max_lock_time = 0.0
+
+            while not self._stop.is_set():
+                batch_started = time.perf_counter()
+                batch = self.db.purge_batch(cutoff, self.batch_size)
+                batch_time = time.perf_counter() - batch_started
+                DB_COMMIT_SECONDS.observe(batch_time, operation='retention_batch')
+
+                lock_time += batch_time
+                max_lock_time = max(max_lock_time, batch_time)
+                deleted += batch
+                batches += 1
+
+                if batch < self.batch_size:
+                    break
+                time.sleep(self.pause)
+
+            # A vacuum that hit its page budget is resumed on the next run, even if nothing was deleted
+            pages_freed = 0
+            if deleted or self.freelist_remaining != 0:
+                pages_freed, self.freelist_remaining = self.db.incremental_vacuum(self.vacuum_pages)
+            elapsed = time.perf_counter() - started
+
+            self.last_report = {
+                'deleted': deleted,
+                'days': days,
+                'cutoff': cutoff,
+                'batches': batches,
+                'elapsed_seconds': round(elapsed, 4),
+                'rows_per_second': round(deleted / elapsed, 1) if elapsed > 0 else 0.0,
+                'lock_time_seconds': round(lock_time, 4),
+                'max_lock_time_seconds': round(max_lock_time, 4),
+                'pages_freed': pages_freed,
+                'freelist_remaining': self.freelist_remaining,
+                'finished_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+
+        logger.info(f"🧹 Retention: deleted {deleted} jobs in {batches} batches "
+                    f"({self.last_report['rows_per_second']} rows/s, lock {lock_time:.3f}s), "
+                    f"{pages_freed} pages freed, {self.freelist_remaining} left")
+        return self.last_report
+
+    def _run_schedule(self):
+        interval = self.interval_hours * 3600
+        # First purge right at startup: a process restarted more often than the
+        # interval would otherwise never get to one
+        wait = 0
+        while not self._stop.wait(wait):
+            wait = interval
+            try:
+                # The lease lasts one interval, so it also records when the last purge ran;
+                # workers that don't hold it check back hourly and take over once it expires
+                if self.shared_state is not None and not self.shared_state.try_acquire_lease('retention', interval):
+                    wait = min(interval, 3600)
+                    continue
+                self.purge()
+            except Exception as e:
+                logger.error(f"❌ Retention error: {e}")
+
+    def start(self):
+        if self.interval_hours <= 0 or self._thread is not None:
+            return
+
+        try:
+            self.db.enable_incremental_vacuum()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not enable incremental vacuum: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_schedule, name='retention', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
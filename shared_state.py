@@ -0,0 +1,255 @@
+# ==================== shared_state.py ====================
+# State shared by all worker processes on one machine, kept in a small SQLite file:
+# per-host request slots, search single-flight/result cache, prefetched pages and leases
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from job_record import json_default
+
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState:
+
+    def __init__(self, path=None, timeout=30, defer_init=False):
+        self.path = path or os.getenv('SHARED_STATE_PATH', 'shared_state.db')
+        self.timeout = timeout
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        if not defer_init:
+            self.init_state()
+
+    def ensure_initialized(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.init_state()
+
+    def _connect(self):
+        self.ensure_initialized()
+        return self._open()
+
+    def _open(self):
+        # One autocommit connection per thread; transactions are explicit (BEGIN IMMEDIATE)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            # A forked worker inherits the parent's pid-qualified owner otherwise
+            self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        return conn
+
+    def init_state(self):
+        conn = self._open()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS host_slots (
+                host TEXT PRIMARY KEY,
+                next_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS search_flights (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                result TEXT
+            );
+            CREATE TABLE IF NOT EXISTS prefetched_pages (
+                key TEXT PRIMARY KEY,
+                jobs TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        ''')
+        self._initialized = True
+
+    def _transaction(self, work):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-then-write is atomic across processes
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(conn)
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    # ---------- Per-host rate limit ----------
+
+    def reserve_host_slot(self, host, interval):
+        """Book the next request slot for a host; returns how long to wait for it"""
+        def work(conn):
+            now = time.time()
+            row = conn.execute('SELECT next_at FROM host_slots WHERE host = ?', (host,)).fetchone()
+            slot = max(now, row[0] if row else 0.0)
+            conn.execute('''
+                INSERT INTO host_slots (host, next_at) VALUES (?, ?)
+                ON CONFLICT(host) DO UPDATE SET next_at = excluded.next_at
+            ''', (host, slot + interval))
+            return slot - now
+
+        return self._transaction(work)
+
+    def host_backlog(self, host):
+        """Seconds until the host's next free request slot (0 = idle)"""
+        row = self._connect().execute('SELECT next_at FROM host_slots WHERE host = ?', (host,)).fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0.0
+
+    def wait_for_host(self, host, interval):
+        wait = self.reserve_host_slot(host, interval)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    # ---------- Leases ----------
+
+    def try_acquire_lease(self, name, ttl):
+        """True if this process holds (or just took over) the named lease"""
+        def work(conn):
+            now = time.time()
+            row = conn.execute('SELECT owner, expires_at FROM leases WHERE name = ?', (name,)).fetchone()
+            if row and row[0] != self.owner and row[1] > now:
+                return False
+            conn.execute('''
+                INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            ''', (name, self.owner, now + ttl))
+            return True
+
+        return self._transaction(work)
+
+    def release_lease(self, name):
+        self._connect().execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, self.owner))
+
+    # ---------- Prefetched pages ----------
+
+    def put_page(self, key, jobs, ttl, max_entries=None):
+        def work(conn):
+            now = time.time()
+            conn.execute('''
+                INSERT INTO prefetched_pages (key, jobs, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET jobs = excluded.jobs, expires_at = excluded.expires_at
+            ''', (key, json.dumps(jobs, ensure_ascii=False, default=json_default), now + ttl))
+            conn.execute('DELETE FROM prefetched_pages WHERE expires_at < ?', (now,))
+            if max_entries:
+                # Oldest entries go first when the cache is over its size
+                conn.execute('''
+                    DELETE FROM prefetched_pages WHERE key IN (
+                        SELECT key FROM prefetched_pages ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (max_entries,))
+
+        self._transaction(work)
+
+    def get_page(self, key):
+        """(jobs, expired) for a prefetched page; jobs is None on a miss"""
+        conn = self._connect()
+        row = conn.execute('SELECT jobs, expires_at FROM prefetched_pages WHERE key = ?', (key,)).fetchone()
+        if not row:
+            return None, False
+        if row[1] < time.time():
+            conn.execute('DELETE FROM prefetched_pages WHERE key = ? AND expires_at < ?', (key, time.time()))
+            return None, True
+        return json.loads(row[0]), False
+
+    def has_page(self, key):
+        row = self._connect().execute('SELECT 1 FROM prefetched_pages WHERE key = ? AND expires_at >= ?',
+                                      (key, time.time())).fetchone()
+        return row is not None
+
+    # ---------- Search single-flight ----------
+
+    def _flight_owner(self):
+        # Per thread, so two requests in the same worker also share one flight
+        return f'{self.owner}:{threading.get_ident()}'
+
+    def _claim_flight(self, key, ttl, stale_after):
+        owner_id = self._flight_owner()
+
+        def work(conn):
+            now = time.time()
+            row = conn.execute(
+                'SELECT owner, started_at, finished_at, result FROM search_flights WHERE key = ?', (key,)
+            ).fetchone()
+            if row:
+                owner, started_at, finished_at, result = row
+                if finished_at is not None and finished_at + ttl > now:
+                    return 'done', json.loads(result)
+                if finished_at is None and started_at + stale_after > now and owner != owner_id:
+                    return 'running', None
+            conn.execute('''
+                INSERT INTO search_flights (key, owner, started_at, finished_at, result)
+                VALUES (?, ?, ?, NULL, NULL)
+                ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, started_at = excluded.started_at,
+                                               finished_at = NULL, result = NULL
+            ''', (key, owner_id, now))
+            return 'leader', None
+
+        return self._transaction(work)
+
+    def _finish_flight(self, key, result, ttl):
+        owner_id = self._flight_owner()
+
+        def work(conn):
+            now = time.time()
+            conn.execute('UPDATE search_flights SET finished_at = ?, result = ? WHERE key = ? AND owner = ?',
+                         (now, json.dumps(result, ensure_ascii=False, default=json_default), key, owner_id))
+            # Expired results are dropped while we hold the lock anyway
+            conn.execute('DELETE FROM search_flights WHERE finished_at < ?', (now - ttl,))
+
+        self._transaction(work)
+
+    def _abandon_flight(self, key):
+        self._connect().execute('DELETE FROM search_flights WHERE key = ? AND owner = ? AND finished_at IS NULL',
+                                (key, self._flight_owner()))
+
+    def single_flight(self, key, compute, ttl=None, stale_after=None, poll_interval=0.5):
+        """Run compute() once per key across all workers; the others wait for and share its result.
+
+        Returns (result, outcome) where outcome is 'computed', 'cached' or 'joined'.
+        """
+        if ttl is None:
+            ttl = float(os.getenv('SEARCH_CACHE_TTL', 300))
+        # A leader that has not finished after this long is presumed dead
+        if stale_after is None:
+            stale_after = float(os.getenv('SEARCH_FLIGHT_TIMEOUT', 600))
+
+        waited = False
+        while True:
+            state, result = self._claim_flight(key, ttl, stale_after)
+            if state == 'done':
+                return result, 'joined' if waited else 'cached'
+            if state == 'leader':
+                break
+            waited = True
+            time.sleep(poll_interval)
+
+        try:
+            result = compute()
+        except Exception:
+            self._abandon_flight(key)
+            raise
+        self._finish_flight(key, result, ttl)
+        return result, 'computed'
+
+
+def search_key(query, location, sources, page, pages):
+    # Case/whitespace/source-order variants of the same search share one flight
+    return json.dumps([' '.join(query.lower().split()), ' '.join(location.lower().split()),
+                       sorted(sources), page, pages])
@@ -4,8 +4,13 @@ from typing import Dict, List, Tuple
 from urllib.parse import urlparse
 import random
 
+from egress import EgressPool
+
 class SiteTester:
-    def __init__(self):
+    def __init__(self, egress: EgressPool = None):
+        # Ті самі маршрути (EGRESS_ROUTES), що й у парсера
+        self.egress = egress or EgressPool()
+        self.session = requests.Session()
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -33,7 +38,7 @@ class SiteTester:
                 'Connection': 'keep-alive'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.egress.request(self.session, 'GET', url, headers=headers, timeout=10)
             
             return {
                 'site': site_name,
@@ -96,7 +101,8 @@ class SiteTester:
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
             }
             
-            response = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
+            response = self.egress.request(self.session, 'HEAD', url, headers=headers, timeout=5,
+                                           allow_redirects=True)
             
             return {
                 'valid': True,
@@ -138,7 +144,7 @@ class SiteTester:
                 'Accept-Language': 'de-DE,de;q=0.9,en;q=0.8'
             }
             
-            response = requests.get(search_url, headers=headers, timeout=15)
+            response = self.egress.request(self.session, 'GET', search_url, headers=headers, timeout=15)
             
             # Перевіряємо чи сторінка містить результати пошуку
             content = response.text.lower()
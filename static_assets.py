@@ -0,0 +1,112 @@
+# ==================== static_assets.py ====================
+# Serves the web UI from memory, precompressed with gzip and brotli
+# Reloaded only when the file on disk changes
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi.responses import Response
+
+from metrics import CACHE_REQUESTS
+from responses import brotli, choose_encoding
+
+
+logger = logging.getLogger(__name__)
+
+
+class StaticAsset:
+
+    def __init__(self, path, media_type='text/html; charset=utf-8', max_age=None, check_interval=1.0):
+        self.path = path
+        self.media_type = media_type
+        if max_age is None:
+            max_age = int(os.getenv('STATIC_MAX_AGE', 300))
+        self.cache_control = f'public, max-age={max_age}, must-revalidate'
+        # At most one stat() per interval, however many requests come in
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._variants = None
+        self._mtime = None
+        self._last_modified = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def load(self):
+        stat = os.stat(self.path)
+        with open(self.path, 'rb') as f:
+            body = f.read()
+
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        # Each encoding is a different byte sequence, so each gets its own strong ETag
+        variants = {None: (body, f'"{digest}"'),
+                    'gzip': (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"')}
+        if brotli is not None:
+            variants['br'] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+        with self._lock:
+            self._variants = variants
+            self._mtime = stat.st_mtime
+            self._last_modified = format_datetime(
+                datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc), usegmt=True)
+            self._checked_at = time.monotonic()
+            self.loads += 1
+
+        logger.info(f"📄 Loaded {os.path.basename(self.path)}: {len(body)} bytes "
+                    f"(gzip {len(variants['gzip'][0])}"
+                    f"{', br ' + str(len(variants['br'][0])) if 'br' in variants else ''})")
+
+    def _refresh_if_changed(self):
+        now = time.monotonic()
+        if self._variants is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if self._variants is None:
+                raise
+            return
+
+        if self._variants is None or mtime != self._mtime:
+            self.load()
+
+    def response(self, request):
+        self._refresh_if_changed()
+
+        encoding = choose_encoding(request.headers.get('accept-encoding', ''))
+        body, etag = self._variants.get(encoding) or self._variants[None]
+        if encoding not in self._variants:
+            encoding = None
+
+        headers = {
+            'ETag': etag,
+            'Last-Modified': self._last_modified,
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+
+        # Any variant's tag means the client has the current file
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match:
+            current = {tag for _, tag in self._variants.values()}
+            candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            if '*' in candidates or current & candidates:
+                CACHE_REQUESTS.inc(cache='static', result='hit')
+                return Response(status_code=304, headers=headers)
+        elif request.headers.get('if-modified-since') == self._last_modified:
+            CACHE_REQUESTS.inc(cache='static', result='hit')
+            return Response(status_code=304, headers=headers)
+
+        CACHE_REQUESTS.inc(cache='static', result='miss')
+
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return Response(body, media_type=self.media_type, headers=headers)
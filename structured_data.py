@@ -0,0 +1,176 @@
+# ==================== structured_data.py ====================
+# Fast path for result pages that embed their listings as JSON (JSON-LD JobPosting
+# blocks or the board's hydration state): found with str.find/regex, decoded with json,
+# no BeautifulSoup tree. parser.py falls back to the DOM selectors when nothing is found
+
+import html
+import json
+import re
+
+
+_DECODER = json.JSONDecoder()
+_LD_SCRIPT = re.compile(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>', re.IGNORECASE)
+_TAGS = re.compile(r'<[^>]+>')
+_CURRENCY_SYMBOLS = {'EUR': '€', 'USD': '$', 'GBP': '£'}
+
+# Hydration state assignments, per source: (marker, path to the list of listings)
+HYDRATION = {
+    'indeed': ('window.mosaic.providerData["mosaic-provider-jobcards"]',
+               ('metaData', 'mosaicProviderJobCardsModel', 'results')),
+    'stepstone': ('window.__PRELOADED_STATE__["app-unifiedResultlist"]', ('searchResults', 'items')),
+}
+
+
+def clean(text, limit=None):
+    # HTML fragment from a JSON field -> plain single-spaced text
+    if not text:
+        return ''
+    if '<' in text:
+        text = _TAGS.sub(' ', text)
+    text = ' '.join(html.unescape(text).split())
+    return text[:limit] if limit else text
+
+
+# ---------- Scanning ----------
+
+def iter_json_ld(page):
+    """Decoded <script type="application/ld+json"> blocks of a page"""
+    for match in _LD_SCRIPT.finditer(page):
+        end = page.find('</script>', match.end())
+        if end < 0:
+            return
+        try:
+            yield json.loads(page[match.end():end])
+        except ValueError:
+            continue
+
+
+def find_assignment(page, marker):
+    """The JSON object assigned right after `marker` (e.g. window.__STATE__ = {...}), or None"""
+    start = page.find(marker)
+    if start < 0:
+        return None
+    start = page.find('{', start + len(marker))
+    if start < 0:
+        return None
+    try:
+        value, _ = _DECODER.raw_decode(page, start)
+    except ValueError:
+        return None
+    return value
+
+
+def _job_postings(node):
+    # JobPosting objects anywhere in a JSON-LD document (@graph, ItemList, ...)
+    if isinstance(node, list):
+        for item in node:
+            yield from _job_postings(item)
+    elif isinstance(node, dict):
+        kind = node.get('@type')
+        if kind == 'JobPosting' or (isinstance(kind, list) and 'JobPosting' in kind):
+            yield node
+            return
+        for key in ('@graph', 'itemListElement', 'item', 'mainEntity'):
+            if key in node:
+                yield from _job_postings(node[key])
+
+
+def _dig(node, path):
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+
+# ---------- Field mapping ----------
+
+def _salary(base_salary):
+    # schema.org MonetaryAmount -> "€50000 - 65000 / year"
+    if not base_salary:
+        return None
+    if not isinstance(base_salary, dict):
+        return clean(str(base_salary))
+    value = base_salary.get('value')
+    unit = None
+    if isinstance(value, dict):
+        unit = value.get('unitText')
+        low, high = value.get('minValue'), value.get('maxValue')
+        value = f'{low} - {high}' if low and high else (low or high or value.get('value'))
+    if value is None:
+        return None
+    currency = base_salary.get('currency', '')
+    text = f"{_CURRENCY_SYMBOLS.get(currency, currency)}{value}"
+    return f"{text} / {unit.lower()}" if unit else text
+
+
+def _location(job_location):
+    if isinstance(job_location, list):
+        job_location = job_location[0] if job_location else None
+    if isinstance(job_location, dict):
+        address = job_location.get('address') or {}
+        if isinstance(address, dict):
+            return address.get('addressLocality') or address.get('addressRegion')
+        return clean(str(address))
+    return clean(job_location) if isinstance(job_location, str) else None
+
+
+def _from_json_ld(posting):
+    organization = posting.get('hiringOrganization')
+    company = organization.get('name') if isinstance(organization, dict) else organization
+    return {
+        'title': clean(posting.get('title')),
+        'company': clean(company),
+        'location': _location(posting.get('jobLocation')),
+        'salary': _salary(posting.get('baseSalary')),
+        'summary': clean(posting.get('description'), 400),
+        'link': posting.get('url'),
+    }
+
+
+def _from_indeed(item, base_url):
+    salary = item.get('salarySnippet')
+    return {
+        'title': clean(item.get('displayTitle') or item.get('title')),
+        'company': clean(item.get('company')),
+        'location': clean(item.get('formattedLocation')),
+        'salary': clean(salary.get('text')) if isinstance(salary, dict) else None,
+        'summary': clean(item.get('snippet'), 400),
+        # Same link the DOM path builds, so both paths dedupe against each other
+        'link': f"{base_url}/viewjob?jk={item['jobkey']}" if item.get('jobkey') else None,
+    }
+
+
+def _from_stepstone(item, base_url):
+    url = item.get('url')
+    return {
+        'title': clean(item.get('title')),
+        'company': clean(item.get('companyName')),
+        'location': clean(item.get('location')),
+        'salary': clean(item.get('salary')) or None,
+        'summary': clean(item.get('textSnippet'), 400),
+        'link': f"{base_url}{url}" if url and url.startswith('/') else url,
+    }
+
+
+_HYDRATION_MAPPERS = {'indeed': _from_indeed, 'stepstone': _from_stepstone}
+
+
+def extract_listings(source, page, base_url):
+    """(listings, how) from the JSON embedded in a result page; ([], None) if there is none.
+
+    Listings are dicts of title/company/location/salary/summary/link, None where the data has no value.
+    """
+    state = HYDRATION.get(source)
+    if state is not None and state[0] in page:
+        items = _dig(find_assignment(page, state[0]), state[1])
+        if isinstance(items, list) and items:
+            mapper = _HYDRATION_MAPPERS[source]
+            return [mapper(item, base_url) for item in items if isinstance(item, dict)], 'hydration'
+
+    if 'application/ld+json' in page:
+        postings = [posting for document in iter_json_ld(page) for posting in _job_postings(document)]
+        if postings:
+            return [_from_json_ld(posting) for posting in postings], 'json-ld'
+
+    return [], None
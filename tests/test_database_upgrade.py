@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from database import JobDatabase
+
+
+PARTITIONS = {'jobs_202403': '2024-03-05 10:00:00', 'jobs_202404': '2024-04-07 09:00:00'}
+
+
+def make_partitioned_text_db(path):
+    # Layout written by monthly partitioning before dictionary encoding:
+    # jobs_YYYYMM tables with inline company/location/source, `jobs` a SELECT * view over them
+    conn = sqlite3.connect(path)
+    n = 0
+    for table, created_at in PARTITIONS.items():
+        conn.execute(f'''
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, company TEXT, location TEXT,
+                salary TEXT, summary TEXT, link TEXT UNIQUE, source TEXT, parsed_at TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, cluster_id INTEGER
+            )
+        ''')
+        conn.execute(f'CREATE INDEX idx_{table}_source ON {table}(source)')
+        conn.execute(f'CREATE INDEX idx_{table}_location ON {table}(location)')
+        conn.execute(f'CREATE INDEX idx_{table}_created_at ON {table}(created_at)')
+        conn.execute(f'CREATE INDEX idx_{table}_cluster ON {table}(cluster_id)')
+        for _ in range(3):
+            n += 1
+            conn.execute(
+                f'INSERT INTO {table} (id, title, company, location, salary, summary, link, source, '
+                f'parsed_at, created_at, cluster_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (n, f'Developer {n}', f'Company {n % 2}', 'Berlin, Germany', '', f'Job {n}',
+                 f'https://example.com/{n}', 'StepStone', '2024-03-01', created_at, n))
+    conn.execute('CREATE VIEW jobs AS ' + ' UNION ALL '.join(f'SELECT * FROM {t}' for t in PARTITIONS))
+    conn.commit()
+    conn.close()
+
+
+def columns(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    finally:
+        conn.close()
+
+
+def test_partitioned_database_is_encoded(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    make_partitioned_text_db(path)
+
+    db = JobDatabase(path)
+    assert db.partition_by_month
+    for table in PARTITIONS:
+        assert 'company_id' in columns(path, table) and 'company' not in columns(path, table)
+
+    rows = sorted(db.iter_jobs(), key=lambda row: row['id'])
+    assert [row['id'] for row in rows] == list(range(1, 7))
+    assert {row['company'] for row in rows} == {'Company 0', 'Company 1'}
+    assert {row['source'] for row in rows} == {'StepStone'}
+    assert rows[0]['created_at'] == PARTITIONS['jobs_202403']
+
+    # New rows go to the current partition and continue the id sequence
+    db.save_jobs([{'title': 'New', 'company': 'Company 1', 'location': 'Berlin', 'salary': '',
+                   'summary': '', 'link': 'https://example.com/new', 'source': 'Indeed',
+                   'parsed_at': '2024-05-01'}])
+    newest = db.get_all_jobs(limit=1)[0]
+    assert newest['id'] == 7 and newest['company'] == 'Company 1'
+
+
+def test_interrupted_upgrade_keeps_old_layout(tmp_path, monkeypatch):
+    path = str(tmp_path / 'jobs.db')
+    make_partitioned_text_db(path)
+
+    original = JobDatabase._encode_jobs_table
+
+    def fail_on_second(self, cursor, old_name, new_name):
+        if old_name == 'jobs_202404':
+            raise RuntimeError('interrupted')
+        return original(self, cursor, old_name, new_name)
+
+    monkeypatch.setattr(JobDatabase, '_encode_jobs_table', fail_on_second)
+    with pytest.raises(RuntimeError):
+        JobDatabase(path)
+    assert 'company' in columns(path, 'jobs_202403')
+
+    monkeypatch.setattr(JobDatabase, '_encode_jobs_table', original)
+    db = JobDatabase(path)
+    assert len(list(db.iter_jobs())) == 6
@@ -0,0 +1,61 @@
+import itertools
+
+from database import JobDatabase
+from dedup import band_keys, collapse_jobs
+
+
+def job(title, company, location='Berlin', source='Indeed', link=None):
+    return {
+        'title': title,
+        'company': company,
+        'location': location,
+        'salary': 'Not specified',
+        'summary': f'{title} at {company}',
+        'link': link or f'https://example.com/{source}/{title}/{company}/{location}',
+        'source': source,
+        'parsed_at': '2024-06-01 12:00:00',
+    }
+
+
+def collide(a, b):
+    return bool(set(band_keys(a)) & set(band_keys(b)))
+
+
+def test_same_company_reworded_title_collapses():
+    pairs = [
+        (job('Senior Python Developer (m/w/d)', 'Zalando SE', 'Berlin, Germany', 'Indeed'),
+         job('Senior Python-Developer (w/m/d)', 'Zalando', 'Berlin', 'StepStone')),
+        (job('Python Developer (m/w/d)', 'SAP SE', 'Walldorf'),
+         job('Python Developer (all genders)', 'SAP', 'Walldorf', 'LinkedIn')),
+        (job('Senior Backend Python Developer Berlin', 'N26 GmbH'),
+         job('Senior Backend Python Developer', 'N26', 'Berlin', 'LinkedIn')),
+    ]
+    for a, b in pairs:
+        collapsed = collapse_jobs([a, b])
+        assert len(collapsed) == 1, (a['title'], b['title'])
+        assert collapsed[0]['duplicates'] == 2
+
+
+def test_different_company_same_title_stays_separate():
+    companies = ['Zalando SE', 'SAP', 'Siemens AG', 'N26', 'Celonis', 'Personio', 'BMW', 'Otto Group']
+    jobs = [job('Senior Python Developer (m/w/d)', company, ['Berlin', 'München'][i % 2])
+            for i, company in enumerate(companies)]
+    assert not any(collide(a, b) for a, b in itertools.combinations(jobs, 2))
+    assert len(collapse_jobs(jobs)) == len(jobs)
+
+
+def test_same_company_different_city_stays_separate():
+    a = job('Store Manager (m/w/d)', 'Otto Group', 'Hamburg')
+    b = job('Store Manager (m/w/d)', 'Otto Group', 'Köln')
+    assert not collide(a, b)
+
+
+def test_database_clusters_follow_the_same_rules(tmp_path):
+    db = JobDatabase(str(tmp_path / 'jobs.db'))
+    db.save_jobs([
+        job('Senior Python Developer (m/w/d)', 'Zalando SE', 'Berlin', 'Indeed'),
+        job('Senior Python-Developer (w/m/d)', 'Zalando', 'Berlin', 'StepStone'),
+        job('Senior Python Developer (m/w/d)', 'Delivery Hero', 'Berlin', 'Indeed'),
+    ])
+    rows = db.get_all_jobs(collapse=True)
+    assert sorted(row['duplicates'] for row in rows) == [1, 2]
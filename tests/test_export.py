@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+import httpx
+
+import main
+from database import JobDatabase
+
+
+def make_db(path, count=3000):
+    db = JobDatabase(str(path))
+    db.save_jobs([{
+        'title': f'Developer {n}',
+        'company': f'Company {n % 40}',
+        'location': 'Berlin',
+        'salary': 'Not specified',
+        'summary': f'Job number {n}',
+        'link': f'https://example.com/jobs/{n}',
+        'source': 'Indeed',
+        'parsed_at': '2024-06-01 12:00:00',
+    } for n in range(count)])
+    return db
+
+
+def test_concurrent_exports(tmp_path, monkeypatch):
+    # Several chunks per response, so the generator is advanced from more than one worker thread
+    monkeypatch.setattr(main, 'db', make_db(tmp_path / 'jobs.db'))
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(client.get('/api/export', params={'format': fmt})
+                                          for fmt in ['ndjson', 'csv'] * 4))
+
+    responses = asyncio.run(run())
+    for response in responses:
+        assert response.status_code == 200
+    ndjson = [r for r in responses if r.headers['content-type'].startswith('application/x-ndjson')]
+    csv = [r for r in responses if r.headers['content-type'].startswith('text/csv')]
+    for response in ndjson:
+        lines = response.text.splitlines()
+        assert len(lines) == 3000
+        assert json.loads(lines[0])['title'] == 'Developer 0'
+    for response in csv:
+        assert len(response.text.splitlines()) == 3001
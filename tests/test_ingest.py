@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+from ingest import IngestQueue
+
+
+class SlowDB:
+    # write_batch waits until released, so a producer can give up first
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def write_batch(self, items):
+        self.release.wait(5)
+        return [len(payload) for kind, payload in items]
+
+
+def test_cancelled_producer_does_not_kill_writer():
+    db = SlowDB()
+    ingest = IngestQueue(db, max_size=10, batch_size=1, max_delay=0)
+
+    async def run():
+        task = asyncio.ensure_future(asyncio.wrap_future(ingest.enqueue_jobs([{'title': 'a'}])))
+        await asyncio.sleep(0.05)
+        # Same as a client disconnecting while run_search awaits the save
+        task.cancel()
+        await asyncio.sleep(0.05)
+        db.release.set()
+        return await asyncio.wait_for(asyncio.wrap_future(ingest.enqueue_jobs([{'title': 'b'}, {'title': 'c'}])), 5)
+
+    try:
+        assert asyncio.run(run()) == 2
+        assert ingest._thread.is_alive()
+    finally:
+        db.release.set()
+        ingest.close()
@@ -0,0 +1,81 @@
+import sqlite3
+
+from database import JobDatabase
+
+
+def make_job(n, **fields):
+    job = {
+        'title': f'Developer {n}',
+        'company': f'Company {n % 3}',
+        'location': 'Berlin, Germany',
+        'salary': 'Not specified',
+        'summary': f'Job number {n}',
+        'link': f'https://example.com/jobs/{n}',
+        'source': 'Indeed',
+        'parsed_at': '2024-03-01 12:00:00',
+    }
+    job.update(fields)
+    return job
+
+
+def object_types(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute(
+            "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') AND name GLOB 'jobs*'"))
+    finally:
+        conn.close()
+
+
+def test_fresh_partitioned_database(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    db = JobDatabase(path, partition_by_month=True)
+    assert db.save_jobs([make_job(n) for n in range(5)]) == 5
+    assert len(db.get_all_jobs()) == 5
+    types = object_types(path)
+    assert types['jobs'] == 'view'
+    assert 'jobs_data' not in types
+
+
+def test_plain_database_migrates_to_partitions(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    db = JobDatabase(path)
+    db.save_jobs([make_job(n) for n in range(6)])
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE jobs_data SET created_at = '2024-03-05 10:00:00' WHERE id <= 3")
+    conn.commit()
+    conn.close()
+
+    db = JobDatabase(path, partition_by_month=True)
+    assert db.save_jobs([make_job(100)]) == 1
+    types = object_types(path)
+    assert types['jobs'] == 'view' and types['jobs_202403'] == 'table'
+    assert 'jobs_data' not in types
+    ids = [job['id'] for job in db.get_all_jobs()]
+    assert sorted(ids) == list(range(1, 8))
+
+
+def test_legacy_jobs_table_becomes_partitioned_view(tmp_path):
+    # A jobs table from before partitioning and dictionary encoding
+    path = str(tmp_path / 'jobs.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, company TEXT, location TEXT, salary TEXT,
+            summary TEXT, link TEXT UNIQUE, source TEXT, parsed_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO jobs (title, company, location, salary, summary, link, source, parsed_at, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(f'Developer {n}', 'ACME', 'Berlin', '', '', f'https://example.com/{n}', 'Indeed',
+          '2024-01-01', '2024-01-02 00:00:00') for n in range(4)])
+    conn.commit()
+    conn.close()
+
+    db = JobDatabase(path, partition_by_month=True)
+    types = object_types(path)
+    assert types['jobs'] == 'view' and types['jobs_202401'] == 'table'
+    rows = db.get_all_jobs()
+    assert len(rows) == 4 and {row['company'] for row in rows} == {'ACME'}
@@ -0,0 +1,116 @@
+import sqlite3
+import time
+
+from database import JobDatabase
+from retention import RetentionManager
+from shared_state import SharedState
+
+
+def make_job(n):
+    return {
+        'title': f'Developer {n}',
+        'company': f'Company {n}',
+        'location': 'Berlin',
+        'salary': 'Not specified',
+        'summary': f'Job number {n}',
+        'link': f'https://example.com/jobs/{n}',
+        'source': 'Indeed',
+        'parsed_at': '2024-01-01 12:00:00',
+    }
+
+
+def age_everything(path, table):
+    conn = sqlite3.connect(path)
+    conn.execute(f"UPDATE {table} SET created_at = '2020-01-01 00:00:00'")
+    conn.execute("UPDATE query_stats_daily SET day = '2020-01-01'")
+    conn.commit()
+    conn.close()
+
+
+def run_purge(db, path, table):
+    db.save_jobs([make_job(n) for n in range(5)])
+    db.save_search_history('python', 'Berlin', ['indeed'], 5)
+    age_everything(path, table)
+    jobs_before = db.get_data_version('jobs')['version']
+    history_before = db.get_data_version('search_history')['version']
+
+    report = RetentionManager(db, days=30, interval_hours=0).purge()
+    assert report['deleted'] == 5
+    assert db.get_data_version('jobs')['version'] > jobs_before
+    assert db.get_data_version('search_history')['version'] > history_before
+
+
+def test_purge_bumps_versions(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    run_purge(JobDatabase(path), path, 'jobs_data')
+
+
+def test_partition_drop_bumps_versions(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    db = JobDatabase(path, partition_by_month=True)
+    conn = sqlite3.connect(path)
+    current = conn.execute("SELECT name FROM sqlite_master WHERE name GLOB 'jobs_[0-9]*'").fetchone()[0]
+    conn.close()
+    # Rows aged inside the current month are trimmed, not dropped; move them to an old partition
+    db.save_jobs([make_job(n) for n in range(5)])
+    conn = sqlite3.connect(path)
+    conn.execute('ALTER TABLE ' + current + ' RENAME TO jobs_202001')
+    conn.commit()
+    conn.close()
+    db = JobDatabase(path)
+    jobs_before = db.get_data_version('jobs')['version']
+
+    report = RetentionManager(db, days=30, interval_hours=0).purge()
+    assert report['deleted'] == 5
+    assert db.get_data_version('jobs')['version'] > jobs_before
+
+
+def wait_for_report(manager, timeout=5):
+    deadline = time.time() + timeout
+    while manager.last_report is None and time.time() < deadline:
+        time.sleep(0.01)
+    return manager.last_report
+
+
+def test_scheduler_purges_at_startup(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    db = JobDatabase(path)
+    db.save_jobs([make_job(n) for n in range(5)])
+    age_everything(path, 'jobs_data')
+    shared = SharedState(str(tmp_path / 'shared_state.db'))
+
+    manager = RetentionManager(db, days=30, interval_hours=24, shared_state=shared)
+    manager.start()
+    try:
+        report = wait_for_report(manager)
+    finally:
+        manager.stop()
+    assert report is not None and report['deleted'] == 5
+
+    # A restarted process (new lease owner) within the interval leaves it alone
+    conn = sqlite3.connect(str(tmp_path / 'shared_state.db'))
+    conn.execute("UPDATE leases SET owner = 'old-host:1' WHERE name = 'retention'")
+    conn.commit()
+    conn.close()
+    manager = RetentionManager(db, days=30, interval_hours=24, shared_state=shared)
+    manager.start()
+    try:
+        assert wait_for_report(manager, timeout=0.5) is None
+    finally:
+        manager.stop()
+
+
+def test_purge_clears_all_stale_lsh_bands(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    db = JobDatabase(path)
+    conn = sqlite3.connect(path)
+    conn.executemany('INSERT INTO job_lsh (band_key, cluster_id, seen_at) VALUES (?, ?, ?)',
+                     [(n, n, '2020-01-01 00:00:00') for n in range(250)])
+    conn.execute("INSERT INTO job_lsh (band_key, cluster_id, seen_at) VALUES (1000, 1, '2999-01-01 00:00:00')")
+    conn.commit()
+
+    # No jobs to delete, far more stale bands than one batch
+    report = RetentionManager(db, days=30, batch_size=100, interval_hours=0).purge()
+    assert report['deleted'] == 0
+    assert conn.execute('SELECT band_key FROM job_lsh').fetchall() == [(1000,)]
+    conn.close()
@@ -0,0 +1,48 @@
+import os
+
+import tracing
+from tracing import SamplingProfiler, requested_mode, start_trace
+
+
+def test_tracing_is_off_by_default(monkeypatch):
+    monkeypatch.delenv('TRACING_ENABLED', raising=False)
+    assert requested_mode('1') is None
+    assert requested_mode('profile') is None
+
+
+def test_profile_needs_its_own_flag(monkeypatch):
+    monkeypatch.setenv('TRACING_ENABLED', '1')
+    monkeypatch.delenv('TRACE_PROFILE_ENABLED', raising=False)
+    assert requested_mode('1') == 'trace'
+    assert requested_mode('profile') == 'trace'
+    assert requested_mode('off') is None
+
+    monkeypatch.setenv('TRACE_PROFILE_ENABLED', '1')
+    assert requested_mode('profile') == 'profile'
+
+
+def test_one_profiler_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setenv('TRACE_PROFILE_DIR', str(tmp_path))
+    with start_trace('first', profile=True) as first:
+        with start_trace('second', profile=True) as second:
+            assert first.profiler is not None
+            assert second.profiler is None
+    with start_trace('third', profile=True) as third:
+        assert third.profiler is not None
+
+
+def test_profile_files_are_capped(tmp_path):
+    for n in range(5):
+        path = tmp_path / f'old{n}.folded'
+        path.write_text('main 1\n')
+        os.utime(path, (n, n))
+
+    with start_trace('search_jobs') as trace:
+        profiler = SamplingProfiler(trace, directory=str(tmp_path), max_files=3)
+        profiler.start()
+    written = profiler.stop()
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 3
+    assert os.path.basename(written) in names
+    assert 'old0.folded' not in names and 'old4.folded' in names
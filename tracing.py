@@ -0,0 +1,239 @@
+# ==================== tracing.py ====================
+# Opt-in per-request tracing: nested timing spans and an optional sampling profile
+# Nothing is recorded unless a trace was started for the current request
+
+import contextvars
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+
+logger = logging.getLogger(__name__)
+
+# Innermost open span of the current request (None = tracing off)
+_current_span = contextvars.ContextVar('trace_span', default=None)
+# One sampling profiler at a time; further profile requests get a plain trace
+_profile_slot = threading.Semaphore(1)
+
+
+class _NoopSpan:
+    # Returned by span() when tracing is off, so the cost is one ContextVar lookup
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+
+    def __init__(self, name, trace, attrs, start=None, end=None):
+        self.name = name
+        self.trace = trace
+        self.attrs = attrs
+        self.thread = threading.current_thread().name
+        self.children = []
+        self.start = start if start is not None else time.perf_counter()
+        self.end = end
+        self.error = None
+        self._token = None
+
+    def __enter__(self):
+        self.trace.threads[threading.get_ident()] += 1
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.error = f'{exc_type.__name__}: {exc}'
+        _current_span.reset(self._token)
+        self.trace.threads[threading.get_ident()] -= 1
+        return False
+
+    def add_child(self, name, start, end, **attrs):
+        # For work done outside the request's context (e.g. the ingest writer thread)
+        child = Span(name, self.trace, attrs, start=start, end=end)
+        self.children.append(child)
+        return child
+
+    def to_dict(self, origin):
+        end = self.end if self.end is not None else time.perf_counter()
+        result = {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round((end - self.start) * 1000, 3),
+            'thread': self.thread,
+        }
+        if self.attrs:
+            result['attrs'] = self.attrs
+        if self.error:
+            result['error'] = self.error
+        if self.children:
+            result['children'] = [c.to_dict(origin) for c in sorted(self.children, key=lambda c: c.start)]
+        return result
+
+
+class Trace:
+
+    def __init__(self, name, profile=False, **attrs):
+        self.id = uuid.uuid4().hex[:16]
+        # Open spans per thread; the profiler only samples threads with one open
+        self.threads = Counter()
+        self.root = Span(name, self, attrs)
+        self.profiler = SamplingProfiler(self) if profile and _profile_slot.acquire(blocking=False) else None
+        self.profile_path = None
+
+    def __enter__(self):
+        if self.profiler:
+            self.profiler.start()
+        self.root.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.root.__exit__(exc_type, exc, tb)
+        if self.profiler:
+            try:
+                self.profile_path = self.profiler.stop()
+            finally:
+                _profile_slot.release()
+        return False
+
+    def to_dict(self):
+        result = {'trace_id': self.id, 'spans': self.root.to_dict(self.root.start)}
+        if self.profiler:
+            result['profile'] = {'path': self.profile_path, 'samples': self.profiler.samples}
+        return result
+
+
+def _env_flag(name, default='0'):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+def requested_mode(value):
+    """X-Trace header / ?trace= value -> None, 'trace' or 'profile'
+
+    Anyone can send the flag, so tracing needs TRACING_ENABLED=1 and profiling,
+    which costs CPU and writes a file, also TRACE_PROFILE_ENABLED=1.
+    """
+    if not value or not _env_flag('TRACING_ENABLED'):
+        return None
+    value = value.strip().lower()
+    if value in ('0', 'false', 'off', 'no'):
+        return None
+    if value == 'profile' and _env_flag('TRACE_PROFILE_ENABLED'):
+        return 'profile'
+    return 'trace'
+
+
+def start_trace(name, profile=False, **attrs):
+    return Trace(name, profile=profile, **attrs)
+
+
+def span(name, **attrs):
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    child = Span(name, parent.trace, attrs)
+    parent.children.append(child)
+    return child
+
+
+def current_span():
+    return _current_span.get()
+
+
+def traced(name=None):
+    """Decorator: run the function inside a span when tracing is on"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func):
+    # Carries the current trace into a thread pool task
+    if _current_span.get() is None:
+        return func
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+class SamplingProfiler:
+    # Samples the stacks of the trace's threads and writes them in folded format
+    # ("thread;outer;inner count"), readable by flamegraph.pl and speedscope
+
+    def __init__(self, trace, interval=None, directory=None, max_files=None):
+        self.trace = trace
+        self.interval = interval or float(os.getenv('TRACE_PROFILE_INTERVAL', 0.005))
+        self.directory = directory or os.getenv('TRACE_PROFILE_DIR', 'traces')
+        # Oldest profiles beyond this many are deleted
+        self.max_files = max_files or int(os.getenv('TRACE_PROFILE_MAX_FILES', 20))
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='trace-profiler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, depth in list(self.trace.threads.items()):
+                frame = frames.get(ident)
+                if frame is None or depth <= 0:
+                    continue
+                if ident not in names:
+                    names[ident] = next((t.name for t in threading.enumerate() if t.ident == ident), str(ident))
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                stack.append(names[ident])
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'{self.trace.id}.folded')
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+        except OSError as e:
+            logger.error(f"❌ Could not write profile: {e}")
+            return None
+        self._prune()
+        logger.info(f"🔬 Profile {path}: {self.samples} samples")
+        return path
+
+    def _prune(self):
+        try:
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if name.endswith('.folded')]
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:max(0, len(paths) - self.max_files)]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not prune profiles: {e}")